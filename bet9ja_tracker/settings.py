@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import dj_database_url
+import json
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tracker.metrics.ViewMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +86,34 @@ DATABASES = {
 }
 
 
+# Cache
+# Pages and the nav list are cached per data version (see tracker/cache.py), so a
+# process-local or file-based backend is enough; no shared cache service is needed.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': os.environ.get("CACHE_LOCATION", "bet9ja-tracker"),
+    }
+}
+
+
+# Tracker categories
+# Each entry is one competition set run_tracker discovers and polls on its own:
+# {"key", "category_id", "base_league", "offsets"}. Unset, only the English-league
+# set is tracked. Set TRACKER_CATEGORIES to a JSON list to add more.
+
+TRACKER_CATEGORIES = json.loads(os.environ.get("TRACKER_CATEGORIES", "[]"))
+
+# Ended seasons' matches and final team states are written here (see tracker/archive.py).
+# On fly, point this at a mounted volume so the archive survives deploys.
+# Their live Match and Team rows are only deleted once the archive is on such
+# storage: set ARCHIVE_PRUNE=1 with ARCHIVE_DIR. Otherwise the rows stay in the DB.
+
+TRACKER_ARCHIVE_DIR = Path(os.environ.get("ARCHIVE_DIR", BASE_DIR / "archive"))
+TRACKER_ARCHIVE_PRUNE = os.environ.get("ARCHIVE_PRUNE") == "1" and "ARCHIVE_DIR" in os.environ
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
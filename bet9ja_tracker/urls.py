@@ -18,11 +18,14 @@ from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import redirect
 from bet9ja_tracker.views import health_check
+from tracker.views import metrics
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("leagues/", include("tracker.urls")),
+    path("api/", include("tracker.api_urls")),
     path("", lambda request: redirect("league-home")),
-    path("health/", health_check)
+    path("health/", health_check),
+    path("metrics", metrics, name="metrics"),
 ]
 
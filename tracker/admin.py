@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import Season, Team, Match
+from .models import Season, Team, Match, Subscription, Notification
 
 admin.site.register(Season)
 admin.site.register(Team)
 admin.site.register(Match)
+admin.site.register(Subscription)
+admin.site.register(Notification)
@@ -0,0 +1,116 @@
+import numpy as np
+
+from .models import SeasonStreakStats
+
+# streaks at or above this are counted together
+MAX_STREAK = 30
+
+
+def team_sequences(home, away, draw, league):
+    """
+    Every match seen from both sides, grouped by team and in match order.
+
+    Returns (team, draw, league) arrays; matches come in (round, match id)
+    order, so a stable sort on team keeps each team's games chronological.
+    """
+    n = len(home)
+    team = np.concatenate([home, away]).astype(np.int64)
+    order = np.concatenate([np.arange(n), np.arange(n)])
+    idx = np.lexsort((order, team))
+    return team[idx], np.concatenate([draw, draw])[idx], np.concatenate([league, league])[idx]
+
+
+def streaks_before(team, draw):
+    """
+    The streak each team carried into each of its matches: consecutive
+    decisive results since its last draw or the start of the season.
+    """
+    i = np.arange(len(team))
+    reset = np.ones(len(team), dtype=bool)
+    reset[1:] = (team[1:] != team[:-1]) | draw[:-1]
+    run_start = np.maximum.accumulate(np.where(reset, i, 0))
+    return i - run_start
+
+
+def season_streak_stats(season):
+    """
+    {league name: next} for one ArchivedSeason, where next[n] is
+    [decisive, draw] counts of matches played on a streak of n.
+    """
+    m = season.matches()
+    settled = np.asarray(m["home_score"]) >= 0
+    if not settled.any():
+        return {}
+    home_score, away_score = np.asarray(m["home_score"])[settled], np.asarray(m["away_score"])[settled]
+    team, draw, league = team_sequences(
+        np.asarray(m["home"])[settled], np.asarray(m["away"])[settled],
+        home_score == away_score, np.asarray(m["league"])[settled],
+    )
+    streak = np.minimum(streaks_before(team, draw), MAX_STREAK)
+
+    leagues = season.meta["leagues"]
+    size = len(leagues) * (MAX_STREAK + 1)
+    cell = league.astype(np.int64) * (MAX_STREAK + 1) + streak
+    decisive = np.bincount(cell[~draw], minlength=size).reshape(len(leagues), -1)
+    drawn = np.bincount(cell[draw], minlength=size).reshape(len(leagues), -1)
+
+    stats = {}
+    for code, name in enumerate(leagues):
+        if decisive[code].any() or drawn[code].any():
+            stats[name] = np.stack([decisive[code], drawn[code]], axis=1)
+    return stats
+
+
+def record_season_stats(season, category):
+    """Store an ArchivedSeason's per-league counts; this row set is the season's cached contribution."""
+    rows = [
+        SeasonStreakStats(
+            season_id=season.season_id, category=category, league_name=name,
+            next_decisive=next_counts[:, 0].tolist(), next_draw=next_counts[:, 1].tolist(),
+        )
+        for name, next_counts in season_streak_stats(season).items()
+    ]
+    SeasonStreakStats.objects.filter(season_id=season.season_id).delete()
+    SeasonStreakStats.objects.bulk_create(rows)
+    return len(rows)
+
+
+def backfill_season_stats(reader, log=print):
+    """Record stats for archived seasons that have none yet, e.g. ones archived before stats existed."""
+    done = set(SeasonStreakStats.objects.values_list("season_id", flat=True).distinct())
+    count = 0
+    for season in reader:
+        if season.season_id not in done:
+            record_season_stats(season, season.meta["category"])
+            count += 1
+    log(f"📊 Recorded streak stats for {count} archived season(s)")
+    return count
+
+
+def streak_report(category=None):
+    """
+    Sum every closed season's counts per league and derive, for each streak
+    length n, how many matches were played on it and the chance the next
+    one was a draw, i.e. that a streak of n broke.
+    """
+    rows = SeasonStreakStats.objects.all()
+    if category:
+        rows = rows.filter(category=category)
+    by_league = {}
+    for name, decisive, drawn in rows.values_list("league_name", "next_decisive", "next_draw"):
+        by_league.setdefault(name, []).append((decisive, drawn))
+
+    report = {}
+    for name, seasons in sorted(by_league.items()):
+        counts = np.asarray(seasons).sum(axis=0)  # (2, MAX_STREAK + 1)
+        decisive, drawn = counts
+        played = decisive + drawn
+        with np.errstate(invalid="ignore", divide="ignore"):
+            p_draw = np.where(played > 0, drawn / played, np.nan)
+        report[name] = {
+            "seasons": len(seasons),
+            "streak": list(range(MAX_STREAK + 1)),
+            "played": played.tolist(),
+            "p_draw": [None if np.isnan(p) else round(float(p), 4) for p in p_draw],
+        }
+    return report
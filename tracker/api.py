@@ -0,0 +1,96 @@
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_GET
+
+from .analytics import streak_report
+from .cache import current_data_version, get_or_build
+from .models import Team
+from .streaklog import compacted_through, read_events
+from .views import active_leagues
+
+LEAGUE_COLUMNS = ["id", "external_id", "name"]
+TEAM_COLUMNS = ["id", "name", "streak", "wins", "draws", "losses"]
+EVENT_COLUMNS = [
+    "seq", "season_id", "league_name", "team_name", "match_id", "round_number", "result", "old_streak", "new_streak",
+]
+
+# most events returned by one streak-events call
+EVENT_PAGE_LIMIT = 1000
+
+
+def columns(rows, names):
+    """Column-oriented payload: one list per field instead of one object per row."""
+    return {name: [row[i] for row in rows] for i, name in enumerate(names)}
+
+
+def version_etag(request, *args, **kwargs):
+    # data only changes when the tracker bumps the version, so it is the whole validator
+    return f"v{current_data_version()}-" + "-".join(map(str, kwargs.values()))
+
+
+@require_GET
+@condition(etag_func=version_etag)
+def league_list(request):
+    def build():
+        rows = list(active_leagues().values_list(*LEAGUE_COLUMNS))
+        return {"version": current_data_version(), **columns(rows, LEAGUE_COLUMNS)}
+
+    return JsonResponse(get_or_build("api:leagues", build))
+
+
+@require_GET
+@condition(etag_func=version_etag)
+def league_teams(request, league_id):
+    def build():
+        league = get_object_or_404(active_leagues(), id=league_id)
+        rows = list(Team.objects.filter(
+            league=league, current_season__active=True
+        ).order_by("-streak").values_list(*TEAM_COLUMNS))
+        return {"version": current_data_version(), "league": league.name, **columns(rows, TEAM_COLUMNS)}
+
+    return JsonResponse(get_or_build(f"api:league:{league_id}", build))
+
+
+@require_GET
+def streak_events(request):
+    """
+    Tail the streak change log: events after ?after=<cursor>, oldest first.
+
+    Pass the returned cursor back to continue. `expired` means events after
+    the given cursor were already compacted away and the consumer should
+    resync from the teams endpoints.
+    """
+    try:
+        after = int(request.GET.get("after", 0))
+        limit = min(int(request.GET.get("limit", EVENT_PAGE_LIMIT)), EVENT_PAGE_LIMIT)
+    except ValueError:
+        return JsonResponse({"error": "after and limit must be integers"}, status=400)
+
+    events = read_events(after, limit)
+    rows = [[getattr(e, name) for name in EVENT_COLUMNS] for e in events]
+    return JsonResponse({
+        "cursor": events[-1].seq if events else after,
+        "expired": after < compacted_through(),
+        **columns(rows, EVENT_COLUMNS),
+    })
+
+
+def streak_stats_etag(request):
+    return version_etag(request, category=request.GET.get("category") or "all")
+
+
+@require_GET
+@condition(etag_func=streak_stats_etag)
+def streak_stats(request):
+    """
+    Per league, across every archived season: the number of seasons, and for
+    each streak length the matches played on it (`played`) and the share of
+    them that were draws, i.e. broke the streak (`p_draw`). ?category=
+    narrows to one category.
+    """
+    category = request.GET.get("category") or None
+
+    def build():
+        return {"version": current_data_version(), "leagues": streak_report(category)}
+
+    return JsonResponse(get_or_build(f"api:streak-stats:{category or 'all'}", build))
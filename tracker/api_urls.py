@@ -0,0 +1,9 @@
+from django.urls import path
+from . import api
+
+urlpatterns = [
+    path("leagues/", api.league_list, name="api-leagues"),
+    path("leagues/<int:league_id>/teams/", api.league_teams, name="api-league-teams"),
+    path("streak-events/", api.streak_events, name="api-streak-events"),
+    path("streak-stats/", api.streak_stats, name="api-streak-stats"),
+]
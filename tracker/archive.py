@@ -0,0 +1,206 @@
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .analytics import record_season_stats
+from .models import League, Match, Season, Team
+
+# one directory per archived season, under <ARCHIVE_DIR>/<category>/<season_id>/
+ARCHIVE_DIR = Path(getattr(settings, "TRACKER_ARCHIVE_DIR", Path(settings.BASE_DIR) / "archive"))
+
+MATCH_COLUMNS = {
+    "match_id": np.int64,
+    "round": np.int16,
+    "home": np.uint16,        # index into meta["teams"]
+    "away": np.uint16,
+    "home_score": np.int8,
+    "away_score": np.int8,
+    "league": np.uint8,       # index into meta["leagues"]
+}
+TEAM_COLUMNS = {
+    "name": np.uint16,
+    "league": np.uint8,
+    "streak": np.int16,
+    "wins": np.int16,
+    "draws": np.int16,
+    "losses": np.int16,
+}
+
+
+def season_dir(season, root=None):
+    return Path(root or ARCHIVE_DIR) / season.category / season.season_id
+
+
+def write_columns(path, prefix, columns, dtypes):
+    for name, dtype in dtypes.items():
+        np.save(path / f"{prefix}.{name}.npy", np.asarray(columns[name], dtype=dtype))
+
+
+def write_season(season, root=None):
+    """
+    Write a season's matches and final team states as one .npy file per column.
+
+    Strings are dictionary-encoded and numbers stored at the narrowest width
+    they need, so a 30-round league takes a few kilobytes, and every column
+    stays a plain array that np.load can memory-map. The files are written
+    to a scratch directory and renamed into place, so readers never see a
+    half-written season.
+    """
+    teams = list(Team.objects.filter(current_season=season).order_by("id"))
+    matches = list(Match.objects.filter(season=season).order_by("round_number", "match_id").values_list(
+        "match_id", "round_number", "home_team_id", "away_team_id", "home_score", "away_score", "league_id"
+    ))
+    league_ids = {t.league_id for t in teams} | {m[6] for m in matches}
+    league_name = dict(League.objects.filter(id__in=league_ids - {None}).values_list("id", "name"))
+    league_name[None] = ""
+
+    team_names = sorted({t.name for t in teams})
+    league_names = sorted({league_name[i] for i in league_ids})
+    team_index = {name: i for i, name in enumerate(team_names)}
+    league_index = {name: i for i, name in enumerate(league_names)}
+    # row id -> position in the dictionary above
+    team_code = {t.id: team_index[t.name] for t in teams}
+    league_code = {i: league_index[league_name[i]] for i in league_ids}
+
+    target = season_dir(season, root)
+    scratch = target.with_name(target.name + ".tmp")
+    shutil.rmtree(scratch, ignore_errors=True)
+    scratch.mkdir(parents=True)
+
+    write_columns(scratch, "matches", {
+        "match_id": [int(m[0]) for m in matches],
+        "round": [m[1] for m in matches],
+        "home": [team_code[m[2]] for m in matches],
+        "away": [team_code[m[3]] for m in matches],
+        "home_score": [m[4] if m[4] is not None else -1 for m in matches],
+        "away_score": [m[5] if m[5] is not None else -1 for m in matches],
+        "league": [league_code[m[6]] for m in matches],
+    }, MATCH_COLUMNS)
+    write_columns(scratch, "teams", {
+        "name": [team_code[t.id] for t in teams],
+        "league": [league_code[t.league_id] for t in teams],
+        "streak": [t.streak for t in teams],
+        "wins": [t.wins for t in teams],
+        "draws": [t.draws for t in teams],
+        "losses": [t.losses for t in teams],
+    }, TEAM_COLUMNS)
+    (scratch / "meta.json").write_text(json.dumps({
+        "season_id": season.season_id,
+        "category": season.category,
+        "started_at": season.started_at.isoformat() if season.started_at else None,
+        "ended_at": season.ended_at.isoformat() if season.ended_at else None,
+        "settled_round": season.settled_round,
+        "total_rounds": season.total_rounds,
+        "teams": team_names,
+        "leagues": league_names,
+    }))
+
+    shutil.rmtree(target, ignore_errors=True)
+    scratch.rename(target)
+    return target, len(matches), len(teams)
+
+
+def archive_season(season, root=None, prune=None):
+    """
+    Move an inactive season out of the live tables: write its archive and
+    streak stats, then, with `prune`, delete its Match and Team rows. The
+    season row is locked throughout, as ingest locks it, so no match can
+    land between the archive being written and the rows being deleted.
+    Returns None if the season was reactivated or archived meanwhile. Safe
+    to re-run after a crash in between, since the archive is simply
+    rewritten.
+
+    `prune` defaults to settings.TRACKER_ARCHIVE_PRUNE: the rows are the only
+    other copy of the season, so they are kept unless the archive root is
+    on storage that outlives the machine.
+    """
+    if prune is None:
+        prune = getattr(settings, "TRACKER_ARCHIVE_PRUNE", False)
+    with transaction.atomic():
+        season = Season.objects.select_for_update().filter(
+            pk=season.pk, active=False, archived_at=None
+        ).first()
+        if season is None:
+            return None
+        path, matches, teams = write_season(season, root)
+        record_season_stats(ArchivedSeason(path), season.category)
+        Season.objects.filter(pk=season.pk).update(archived_at=timezone.now())
+        if prune:
+            league_ids = set(Team.objects.filter(current_season=season).values_list("league_id", flat=True))
+            Match.objects.filter(season=season).delete()
+            Team.objects.filter(current_season=season).delete()
+            # leagues are recreated every season; drop this season's once no team uses them
+            League.objects.filter(id__in=league_ids - {None}, team__isnull=True).delete()
+    return path, matches, teams
+
+
+def archive_pending(root=None, limit=None, log=print, prune=None):
+    """Archive inactive seasons not archived yet, oldest first; returns how many were archived."""
+    pending = Season.objects.filter(active=False, archived_at=None).order_by("id")
+    done = 0
+    for season in pending[:limit] if limit else pending:
+        archived = archive_season(season, root, prune)
+        if archived is None:
+            continue
+        path, matches, teams = archived
+        log(f"📦 Archived season {season.season_id}: {matches} match(es), {teams} team(s) -> {path}")
+        done += 1
+    return done
+
+
+class ArchivedSeason:
+    """Read-only view of one archived season; columns are memory-mapped on first access."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text())
+        self.columns = {}
+
+    @property
+    def season_id(self):
+        return self.meta["season_id"]
+
+    def column(self, table, name):
+        key = f"{table}.{name}"
+        if key not in self.columns:
+            self.columns[key] = np.load(self.path / f"{key}.npy", mmap_mode="r")
+        return self.columns[key]
+
+    def matches(self):
+        return {name: self.column("matches", name) for name in MATCH_COLUMNS}
+
+    def teams(self):
+        return {name: self.column("teams", name) for name in TEAM_COLUMNS}
+
+    def team_names(self, codes):
+        names = self.meta["teams"]
+        return [names[c] for c in codes]
+
+
+class ArchiveReader:
+    """Every archived season under `root`, optionally limited to one category."""
+
+    def __init__(self, root=None, category=None):
+        self.root = Path(root or ARCHIVE_DIR)
+        self.category = category
+
+    def season_paths(self):
+        pattern = f"{self.category or '*'}/*/meta.json"
+        # skips scratch directories a crashed archive run left behind
+        paths = [p.parent for p in self.root.glob(pattern) if p.parent.name.isdigit()]
+        return sorted(paths, key=lambda p: int(p.name))
+
+    def __iter__(self):
+        for path in self.season_paths():
+            yield ArchivedSeason(path)
+
+    def season(self, season_id, category=None):
+        category = category or self.category or "*"
+        for meta in self.root.glob(f"{category}/{season_id}/meta.json"):
+            return ArchivedSeason(meta.parent)
+        return None
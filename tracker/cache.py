@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .metrics import CACHE_REQUESTS
+from .models import DataVersion
+
+VERSION_KEY = "tracker:data-version"
+
+# how long a web process trusts its cached copy of the version
+VERSION_TTL = getattr(settings, "TRACKER_VERSION_TTL", 2)
+
+# versioned entries are never invalidated, only superseded, so they just need to outlive a round
+PAGE_TTL = getattr(settings, "TRACKER_PAGE_TTL", 600)
+
+
+def current_data_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = DataVersion.objects.filter(pk=1).values_list("version", flat=True).first() or 0
+        cache.set(VERSION_KEY, version, VERSION_TTL)
+    return version
+
+
+def bump_data_version():
+    """Advance the data version so every cached page and fragment is rebuilt on next use."""
+    updated = DataVersion.objects.filter(pk=1).update(version=F("version") + 1, updated_at=timezone.now())
+    if not updated:
+        DataVersion.objects.get_or_create(pk=1, defaults={"version": 1})
+    cache.delete(VERSION_KEY)
+
+
+def versioned_key(*parts):
+    return ":".join(["tracker", f"v{current_data_version()}", *map(str, parts)])
+
+
+def get_or_build(key, build):
+    """Return the cached value under a versioned key, building and storing it on a miss."""
+    full_key = versioned_key(key)
+    value = cache.get(full_key)
+    kind = key.split(":", 1)[0]
+    if value is None:
+        CACHE_REQUESTS.inc(kind=kind, result="miss")
+        value = build()
+        cache.set(full_key, value, PAGE_TTL)
+    else:
+        CACHE_REQUESTS.inc(kind=kind, result="hit")
+    return value
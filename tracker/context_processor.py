@@ -1,6 +1,13 @@
+from django.utils.functional import SimpleLazyObject
+
+from .cache import get_or_build
 from .models import League
 
+
 def leagues_nav(request):
+    # lazy, so templates that never show the nav (e.g. admin) skip the cache and DB entirely
     return {
-        "all_leagues": League.objects.all().order_by("external_id")
+        "all_leagues": SimpleLazyObject(
+            lambda: get_or_build("nav:leagues", lambda: list(League.objects.all().order_by("external_id")))
+        )
     }
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from tracker.analytics import backfill_season_stats
+from tracker.archive import ARCHIVE_DIR, ArchiveReader, archive_pending
+
+
+class Command(BaseCommand):
+    help = "Write inactive seasons to the columnar archive, deleting their live rows when TRACKER_ARCHIVE_PRUNE is set."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=None, help=f"Archive root (default {ARCHIVE_DIR})")
+        parser.add_argument("--limit", type=int, default=None, help="Archive at most this many seasons")
+        parser.add_argument("--stats", action="store_true", help="Also record streak stats for archived seasons that lack them")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            backfill_season_stats(ArchiveReader(options["dir"]), log=self.stdout.write)
+        done = archive_pending(root=options["dir"], limit=options["limit"], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"✅ Archived {done} season(s)"))
@@ -1,28 +1,87 @@
+import json
+import time
+from pathlib import Path
+
 from django.core.management.base import BaseCommand
-from django.db.models import Q
-from tracker.models import Team, Match
+from django.db.models import F, Max, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from tracker.models import Match, Team
+
+# kept out of WorkerCheckpoint, whose rows count as live tracker workers
+CHECKPOINT_FILE = ".backfill-checkpoint.json"
+
+
+def league_source():
+    """
+    The League a team should point at, as a correlated subquery on the team's
+    season: the league another team of the season already has, or else that
+    of one of its own matches, found through the (team, season) indexes.
+    """
+    sibling = Team.objects.filter(
+        current_season=OuterRef("current_season"), league__isnull=False
+    ).values("league")[:1]
+
+    def match_league(side):
+        return Subquery(Match.objects.filter(
+            **{side: OuterRef("pk")}, season=OuterRef("current_season"), league__isnull=False
+        ).values("league")[:1])
+
+    return Coalesce(Subquery(sibling), match_league("home_team"), match_league("away_team"))
+
 
 class Command(BaseCommand):
-    help = "Backfill missing league names for teams using their matches"
+    help = "Backfill missing leagues for teams from their season, in batched set-based UPDATEs"
 
-    def handle(self, *args, **kwargs):
-        updated = 0
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Team ids covered per UPDATE")
+        parser.add_argument("--dry-run", action="store_true", help="Count what would change without writing")
+        parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="Where the last finished batch is kept for resuming")
+        parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+
+    def handle(self, *args, **options):
+        checkpoint = Path(options["checkpoint"])
+        dry_run = options["dry_run"]
+        batch = options["batch_size"]
 
-        # Get all teams with no league
-        teams = Team.objects.filter(Q(league__isnull=True) | Q(league=""))
-        self.stdout.write(f"🔎 Found {teams.count()} teams without league...")
+        resume = 0 if options["restart"] else self.load_checkpoint(checkpoint)
+        bounds = Team.objects.filter(league__isnull=True).aggregate(lo=Min("id"), hi=Max("id"))
+        max_id = bounds["hi"] or 0
+        last_id = max(resume, (bounds["lo"] or 1) - 1)
+        if resume:
+            self.stdout.write(f"↩️ Resuming after team id {resume}")
+        self.stdout.write(f"🔎 Teams without league up to id {max_id}; {'counting' if dry_run else 'updating'} in batches of {batch}")
+
+        updated = 0
+        started = time.monotonic()
+        while last_id < max_id:
+            hi = min(last_id + batch, max_id)
+            rows = Team.objects.filter(id__gt=last_id, id__lte=hi, league__isnull=True).annotate(
+                found=league_source()
+            ).filter(found__isnull=False)
+            if dry_run:
+                count = rows.count()
+            else:
+                count = rows.update(league=F("found"))
+                self.store_checkpoint(checkpoint, hi)
+            updated += count
+            last_id = hi
+            self.stdout.write(
+                f"⏳ {last_id}/{max_id} ({100 * last_id / max_id:.0f}%): {updated} team(s) "
+                f"{'would be ' if dry_run else ''}backfilled, {time.monotonic() - started:.1f}s"
+            )
 
-        for team in teams:
-            # find a match where this team appeared in the same season
-            match = Match.objects.filter(
-                season=team.current_season
-            ).filter(
-                Q(home_team=team.name) | Q(away_team=team.name)
-            ).exclude(league__isnull=True).exclude(league="").first()
+        if not dry_run:
+            checkpoint.unlink(missing_ok=True)
+        verb = "Would backfill" if dry_run else "Backfilled"
+        self.stdout.write(self.style.SUCCESS(f"✅ {verb} league for {updated} teams"))
 
-            if match and match.league:
-                team.league = match.league
-                team.save(update_fields=["league"])
-                updated += 1
+    def load_checkpoint(self, path):
+        try:
+            return int(json.loads(path.read_text())["last_id"])
+        except (FileNotFoundError, ValueError, KeyError):
+            return 0
 
-        self.stdout.write(self.style.SUCCESS(f"✅ Backfilled league for {updated} teams"))
+    def store_checkpoint(self, path, last_id):
+        scratch = path.with_name(path.name + ".tmp")
+        scratch.write_text(json.dumps({"last_id": last_id}))
+        scratch.replace(path)
@@ -0,0 +1,81 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+
+from tracker.management.commands.run_tracker import Command as TrackerCommand
+from tracker.utils.benchmark import run_ingest_benchmark
+
+
+def server_version():
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version
+    if connection.vendor == "postgresql":
+        return str(connection.pg_version)
+    return None
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark match ingestion on synthetic seasons against a throwaway test "
+        "database of the configured backend (point DATABASE_URL at SQLite or PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--leagues", type=int, default=8)
+        parser.add_argument("--teams", type=int, default=20)
+        parser.add_argument("--rounds", type=int, default=30)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="benchmarks", help="Directory for the JSON result")
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={"default"})
+        try:
+            results = run_ingest_benchmark(
+                TrackerCommand(),
+                leagues=options["leagues"],
+                teams=options["teams"],
+                rounds=options["rounds"],
+                seed=options["seed"],
+            )
+            database = {"vendor": connection.vendor, "version": server_version()}
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        report = {
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "database": database,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "params": {k: options[k] for k in ("leagues", "teams", "rounds", "seed")},
+            "results": results,
+        }
+
+        for r in results:
+            self.stdout.write(
+                f"📊 {r['scenario']}: {r['matches']} matches, {r['matches_per_sec']}/s, "
+                f"{r['queries_per_match']} queries/match, txn mean {r['txn_ms_mean']}ms, "
+                f"peak {r['peak_memory_kb']}KB"
+            )
+
+        out_dir = Path(options["output"])
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / f"ingest-{database['vendor']}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.json"
+        path.write_text(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"✅ Results written to {path}"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.cache import bump_data_version
+from tracker.models import Season
+from tracker.rebuild import CHUNK_SIZE, rebuild_streaks
+
+
+class Command(BaseCommand):
+    help = "Recompute Team streaks, wins, draws and losses from stored matches, or with --verify only report differences."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--season", action="append", default=[], help="Season id to rebuild (repeatable; default all live seasons)")
+        parser.add_argument("--category", default=None, help="Only seasons of this category")
+        parser.add_argument("--verify", action="store_true", help="Report differences without writing; exits non-zero if any")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Match rows fetched per round trip")
+        parser.add_argument("--show", type=int, default=20, help="Differences printed per season")
+
+    def handle(self, *args, **options):
+        seasons = Season.objects.filter(archived_at=None).order_by("id")
+        if options["season"]:
+            seasons = seasons.filter(season_id__in=options["season"])
+        if options["category"]:
+            seasons = seasons.filter(category=options["category"])
+
+        apply = not options["verify"]
+        found = rebuild_streaks(seasons, apply=apply, chunk_size=options["chunk_size"], log=self.stdout.write)
+        for season_id, diffs in found.items():
+            for name, field, stored, expected in diffs[:options["show"]]:
+                self.stdout.write(f"   {season_id} {name}: {field} {stored} -> {expected}")
+
+        if not found:
+            self.stdout.write(self.style.SUCCESS("✅ Team rows match their match history"))
+        elif apply:
+            bump_data_version()
+            self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {len(found)} season(s)"))
+        else:
+            raise CommandError(f"{len(found)} season(s) differ from their match history")
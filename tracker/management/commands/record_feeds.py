@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from tracker.management.commands.run_tracker import RELEVANT_OFFSETS
+from tracker.utils.replay import record_feeds
+
+
+class Command(BaseCommand):
+    help = "Record stats_season_lastx payloads to disk for replay_feeds."
+
+    def add_arguments(self, parser):
+        parser.add_argument("base_season_id", type=int, help="Base (English league) season ID")
+        parser.add_argument("--out", default="recordings", help="Directory to write snapshots to")
+        parser.add_argument("--interval", type=int, default=10, help="Polling seconds")
+        parser.add_argument("--duration", type=int, default=None, help="Stop after this many seconds")
+        parser.add_argument("--feed-base-url", default=None, help="Feed host to record from")
+
+    def handle(self, *args, **options):
+        season_ids = [str(options["base_season_id"] + offset) for offset in RELEVANT_OFFSETS]
+        self.stdout.write(f"🎙️ Recording {season_ids[0]}..{season_ids[-1]} into {options['out']}")
+        try:
+            record_feeds(
+                options["out"],
+                season_ids,
+                base_url=options["feed_base_url"],
+                interval=options["interval"],
+                duration=options["duration"],
+                log=self.stdout.write,
+            )
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("✅ Recording stopped"))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.utils.replay import ReplayFeed, load_recording, make_replay_server
+
+
+class Command(BaseCommand):
+    help = "Serve recorded seasons as a local stand-in for the live feed (see run_tracker --feed-base-url)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("recording_dir", help="Directory written by record_feeds")
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8800)
+        parser.add_argument("--speed", type=float, default=1.0, help="Virtual-time speed-up")
+        parser.add_argument("--round-seconds", type=int, default=180, help="Virtual seconds per round")
+        parser.add_argument("--season-span", type=int, default=8, help="Consecutive season IDs played together")
+
+    def handle(self, *args, **options):
+        seasons = load_recording(options["recording_dir"])
+        if not seasons:
+            raise CommandError(f"No recorded seasons in {options['recording_dir']}")
+
+        feed = ReplayFeed(
+            seasons,
+            round_seconds=options["round_seconds"],
+            speed=options["speed"],
+            season_span=options["season_span"],
+        )
+        server = make_replay_server(feed, options["host"], options["port"])
+        self.stdout.write(
+            f"📼 Replaying {len(seasons)} season(s) at {options['speed']}x on "
+            f"http://{options['host']}:{options['port']}"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
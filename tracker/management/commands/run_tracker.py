@@ -1,24 +1,37 @@
+import json
+import signal
+import sys
+import threading
 import time
-import re
-import requests
-from datetime import datetime
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from tracker.models import Season, Team, Match, League
-from playwright.sync_api import sync_playwright
-from tracker.utils.playwright_helpers import discover_season_id_via_playwright
+from concurrent.futures import ThreadPoolExecutor
+from django.db import close_old_connections, connection, transaction
+from tracker.models import (
+    DEFAULT_CATEGORY, Season, Team, Match, League, Notification, StreakEvent, WorkerCheckpoint,
+)
+from tracker.archive import archive_pending
+from tracker.cache import bump_data_version
+from tracker.metrics import DISCOVERY_SECONDS, start_metrics_server
+from tracker.notifications import Notifier, deliver_pending, pending_notifications
+from tracker.rebuild import STATE_FIELDS, apply_result
+from tracker.streaklog import append_events, compact_streak_log
+from tracker.utils.feeds import FeedFetcher, round_progress
+from tracker.utils.categories import (
+    BASE_LEAGUE_NAME, RELEVANT_OFFSETS, Category, league_base_name, load_categories,
+)
+from tracker.utils.leases import claim_leases, ensure_leases, release_leases, worker_identity
+from tracker.utils.pipeline import IngestPipeline
+from tracker.utils.scheduler import PollScheduler
+from tracker.utils.tracing import CycleTracer
 import os
 from django.utils import timezone
+from django.utils.functional import cached_property
 #is_fly = os.environ.get("FLY_APP_NAME") is not None
 
 
-API_FEED_FMT = (
-    "https://vgls-vs001.akamaized.net/vfl/feeds/?/bet9javirtuals/en/"
-    "Africa:Lagos/gismo/stats_season_lastx/{season_id}/13"
-)
-
-# we only care about these offsets relative to base season
-RELEVANT_OFFSETS = [0,1, 2, 3, 4, 5, 6, 7]
+def json_copy(value):
+    """Deep copy through JSON, matching what a checkpoint round-trip returns."""
+    return json.loads(json.dumps(value))
 
 
 class Command(BaseCommand):
@@ -26,134 +39,441 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("--poll-interval", type=int, default=10, help="Polling seconds")
+        parser.add_argument("--min-poll-interval", type=float, default=2, help="Polling seconds around an expected round settle")
+        parser.add_argument("--max-poll-interval", type=float, default=60, help="Longest sleep between polls mid-round")
+        parser.add_argument("--fixed-interval", action="store_true", help="Always sleep --poll-interval instead of following the round cadence")
+        parser.add_argument("--cycle-deadline", type=float, default=15, help="Max seconds to wait for all feeds in one cycle")
+        parser.add_argument("--headed", action="store_true", help="Run the discovery browser headed (needs a display, e.g. xvfb)")
+        parser.add_argument("--write-batch", type=int, default=8, help="Leagues committed per DB transaction")
+        parser.add_argument("--queue-size", type=int, default=4, help="Payloads buffered between pipeline stages")
+        parser.add_argument("--worker-name", default=None, help="Name this worker's checkpoint and leases are kept under (default: tracker, or a per-machine name with --shard)")
+        parser.add_argument("--shard", action="store_true", help="Split league offsets with other --shard workers through DB leases")
+        parser.add_argument("--lease-ttl", type=int, default=90, help="Seconds a league lease lasts without a heartbeat")
+        parser.add_argument("--feed-base-url", default=os.environ.get("FEED_BASE_URL"), help="Feed host to poll instead of the live one, e.g. a replay_feeds server")
+        parser.add_argument("--probe-span", type=int, default=32, help="Season IDs to probe past the last known one before falling back to Playwright")
+        parser.add_argument("--categories", help="Comma-separated TRACKER_CATEGORIES keys to track (default: all)")
+        parser.add_argument("--max-concurrency", type=int, default=16, help="Feed requests in flight at once, across all categories")
+        parser.add_argument("--metrics-port", type=int, default=os.environ.get("METRICS_PORT"), help="Serve Prometheus metrics on this port")
+        parser.add_argument("--trace", action="store_true", help="Keep span timings of recent cycles; dumped on exit and on SIGUSR1")
+        parser.add_argument("--trace-cycles", type=int, default=200, help="Cycles kept in the trace ring buffer")
+        parser.add_argument("--trace-dir", default="traces", help="Where traces and profiles are written")
+        parser.add_argument("--profile", type=int, default=0, metavar="N", help="Run every Nth cycle of each category under cProfile")
+        parser.add_argument("--rate-limit", type=float, default=20, help="Feed requests per second, across all categories (0 = unlimited)")
 
     def handle(self, *args, **options):
-        poll_interval = options.get("poll_interval") or 10
-        current_season_id = None
+        self.options = options
+        self.headless = not options.get("headed")
+        self.feed_base_url = options.get("feed_base_url")
+        self.max_concurrency = options.get("max_concurrency") or 16
+        self.rate_limit = options.get("rate_limit")
+        self.worker_name = worker_identity(options.get("worker_name"), options.get("shard"))
+        self.checkpoint = WorkerCheckpoint.load(self.worker_name)
+        self.checkpoint_lock = threading.Lock()
+        self.discovery_lock = threading.Lock()
+        self.delivery_lock = threading.Lock()
+        self.delivery = None
+        self.tracer = CycleTracer(
+            capacity=options.get("trace_cycles") or 200,
+            enabled=options.get("trace"),
+            profile_every=options.get("profile") or 0,
+            out_dir=options.get("trace_dir") or "traces",
+            log=self.stdout.write,
+        )
+        if options.get("trace"):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.dump_trace())
+        # exit normally on SIGTERM so leases are released and traces dumped
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        if options.get("metrics_port"):
+            start_metrics_server(int(options["metrics_port"]))
+            self.stdout.write(f"📊 Serving metrics on :{options['metrics_port']}/metrics")
 
+        try:
+            self.track_categories(options)
+        finally:
+            if options.get("trace"):
+                self.dump_trace()
+
+    def track_categories(self, options):
+        keys = options.get("categories")
+        categories = load_categories(keys.split(",") if keys else None)
+        if not categories:
+            self.stdout.write(f"⚠️ No configured category matches {keys!r}")
+            return
+        # each category fetches on its own share of the slots, so none can starve the others
+        self.fetch_share = max(1, self.max_concurrency // len(categories))
+        if len(categories) == 1:
+            self.track_category(categories[0])
+            return
+
+        # one thread per category; they share the fetcher's session and rate limit,
+        # and a category that hangs or keeps failing only delays itself
+        threads = [
+            threading.Thread(target=self.track_category_forever, args=(c,), name=f"tracker-{c.key}", daemon=True)
+            for c in categories
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(t.is_alive() for t in threads):
+                for thread in threads:
+                    thread.join(timeout=1)
+        finally:
+            if options.get("shard"):
+                release_leases(self.worker_name)
+
+    def dump_trace(self):
+        path = self.tracer.dump()
+        self.stdout.write(f"🗂️ Wrote {len(self.tracer.cycles)} traced cycles to {path}")
+
+    def track_category_forever(self, category):
+        """Keep one category's tracking loop running, restarting it after any error."""
         while True:
+            try:
+                self.track_category(category)
+            except Exception as e:
+                self.stdout.write(f"💥 Category {category.key} failed: {e!r}, restarting in 30s")
+                close_old_connections()
+                time.sleep(30)
+
+    def track_category(self, category):
+        """Discover, poll and roll over the seasons of one category until stopped."""
+        options = getattr(self, "options", {})
+        poll_interval = options.get("poll_interval") or 10
+        cycle_deadline = options.get("cycle_deadline") or 15
+        probe_span = options.get("probe_span") or 32
+        scheduler = PollScheduler(
+            default_interval=poll_interval,
+            min_interval=options.get("min_poll_interval") or 2,
+            max_interval=options.get("max_poll_interval") or 60,
+            name=category.key,
+        )
+        worker_name = self.worker_name
+        pipeline = IngestPipeline(
+            self.fetcher,
+            lambda sid, matches, season_data: self.persist_feed(sid, matches, season_data, category.key),
+            queue_size=options.get("queue_size") or 4,
+            batch_size=options.get("write_batch") or 8,
+            log=self.stdout.write,
+            name=category.key,
+        )
+        checkpoint = self.category_checkpoint(category.key)
+        season = self.resume_season(checkpoint)
+        current_season_id = season.season_id if season else None
+        last_season_id = checkpoint.get("last_season_id") or self.last_known_season_id(category.key)
+        shard = options.get("shard")
+        lease_ttl = options.get("lease_ttl") or 90
+        offsets = category.offsets
+        if shard:
+            ensure_leases(category.offsets, category.key)
+
+        def run_cycle(cycle):
+            """One poll of this category; returns the seconds to sleep before the next."""
+            nonlocal current_season_id, last_season_id, offsets, season
+            changed = False
+            self.notifier.refresh()
+            if shard:
+                with cycle.span("leases"):
+                    claimed = claim_leases(worker_name, category.offsets, lease_ttl, category.key)
+                if claimed != offsets:
+                    self.stdout.write(f"🔑 {worker_name} now holds {category.key} offsets {claimed}")
+                offsets = claimed
+
+            # the holder of the base offset discovers seasons and handles rollover;
+            # other workers follow whatever base season it recorded
+            leader = category.offsets[0] in offsets
+            if not leader:
+                season = self.active_base_season(category.key)
+                current_season_id = season.season_id if season else None
+                if not current_season_id or not offsets:
+                    return min(poll_interval, lease_ttl / 3)
+
             if not current_season_id:
-                current_season_id = self.capture_new_season_id()
+                with cycle.span("discover"):
+                    current_season_id = self.discover_season_id(last_season_id, probe_span, cycle_deadline, category)
                 if not current_season_id:
-                    self.stdout.write("⚠️ Could not capture season ID, retrying...")
-                    time.sleep(30)
-                    continue
+                    self.stdout.write(f"⚠️ Could not capture {category.key} season ID, retrying...")
+                    return 30
 
-                # Deactivate all previous seasons not in the relevant offsets
-                Season.objects.exclude(season_id__in=[
-    str(int(current_season_id) + offset) for offset in RELEVANT_OFFSETS
-]).update(active=False)
-
-# Delete all teams from ended seasons
-                Team.objects.filter(current_season__active=False).delete()
-
-# Remove leagues with no active teams or seasons
-                League.objects.filter(team__current_season__active=False).delete()
-
-# Create and activate the new season
-                season, _ = Season.objects.get_or_create(season_id=str(current_season_id))
-                season.started_at = datetime.utcnow()
-                season.active = True
-                season.save()
-                self.stdout.write(f"🏁 New season {season.season_id} created and old ones deactivated")
+                with cycle.span("rollover", season=current_season_id):
+                    season = self.roll_over(category, current_season_id)
+                self.stdout.write(f"🏁 New {category.key} season {season.season_id} created and old ones deactivated")
+                self.archiver.submit(self.archive_ended_seasons)
+                changed = True
 
             base_id = int(current_season_id)
 
-            # loop relevant leagues
-            for offset in RELEVANT_OFFSETS:
-                sid = str(base_id + offset)
-                matches, season_data = self.fetch_all_matches(sid)
-                if matches:
-                    league_obj = self.get_or_create_league(season_data)
-                    new_count = self.process_matches_for_season(matches, sid, league_obj)
-                    if new_count:
-                        self.stdout.write(f"✅ Processed {new_count} match(es) for {league_obj.name} ({sid})")
-
-            # check season end (English league is base reference)
-            base_matches, _ = self.fetch_all_matches(current_season_id)
-            if base_matches and self.season_has_ended(base_matches):
-                season.active = False
-                # Delete all teams from the just-ended season
-                Team.objects.filter(current_season=season).delete()
-                season.ended_at = datetime.utcnow()
-                season.save()
+            # fetch, parse and persist every league this worker holds as a pipeline
+            season_ids = [str(base_id + offset) for offset in offsets]
+            labels = {str(base_id + offset): f"{category.key}:{offset}" for offset in offsets}
+            with cycle.span("pipeline", leagues=len(season_ids)):
+                feeds, new_counts, timings = pipeline.run(
+                    season_ids, deadline=cycle_deadline, labels=labels, trace=cycle
+                )
+
+            last_error = scheduler.last_error
+            for sid in season_ids:
+                matches, _ = feeds.get(sid, (None, None))
+                if matches is not None:
+                    scheduler.observe(sid, matches)
+            if any(new_counts.values()):
+                changed = True
+                self.stdout.write(f"🧵 {category.key} " + " · ".join(
+                    f"{stage} {t['seconds']:.2f}s/{t['items']}" for stage, t in timings.items()
+                ))
+
+            if scheduler.last_error != last_error:
+                self.stdout.write(
+                    f"📈 Round settled {scheduler.last_error:+.1f}s from prediction "
+                    f"(mean abs error {scheduler.mean_abs_error:.1f}s)"
+                )
+
+            # check season end (the base league is the reference), answered from
+            # the watermark ingest just stored; only needed when the base feed changed
+            base_matches, _ = feeds.get(str(base_id), (None, None))
+            if base_matches:
+                season.refresh_from_db(fields=["settled_round", "total_rounds"])
+            if base_matches and season.has_ended():
+                with cycle.span("season_end", season=current_season_id):
+                    season.active = False
+                    season.ended_at = timezone.now()
+                    season.save()
+                    compacted, expired = compact_streak_log()
+                    if compacted or expired:
+                        self.stdout.write(f"🗜️ Streak log: compacted {compacted}, expired {expired} event(s)")
                 self.stdout.write(f"🏁 Season {current_season_id} ended")
+                # its teams and matches move to the archive in the background
+                self.archiver.submit(self.archive_ended_seasons)
+                last_season_id = current_season_id
                 current_season_id = None  # reset
+                scheduler.reset()
+                changed = True
 
-            time.sleep(poll_interval)
-
-    def capture_new_season_id(self):
-        self.stdout.write("🎭 Launching Playwright to capture new season ID...")
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=False,args=[
-        "--no-sandbox",
-        "--disable-setuid-sandbox",
-        "--disable-dev-shm-usage",
-        "--disable-gpu",
-        "--single-process",
-        "--disable-background-networking",
-        "--disable-default-apps",
-        "--disable-extensions",
-        "--disable-sync",
-        "--metrics-recording-only",
-        "--mute-audio",
-        "--no-first-run",
-        "--no-zygote",
-        "--window-size=1,1",
-        "--disable-blink-features=AutomationControlled",
-        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118 Safari/537.36"
-    ])
-            page = browser.new_page()
-            page.goto("https://st-cdn001.akamaized.net/bet9javirtuals/en/1/category/1111")
-
-            captured = []
-
-            def log_request(req):
-                if "stats_season_lastx" in req.url:
-                    captured.append(req.url)
-
-            page.on("request", log_request)
+            if changed:
+                # everything above has committed, so readers may now see the new data
+                with cycle.span("bump_version"):
+                    bump_data_version()
 
-            try:
-                page.wait_for_selector("a:has-text('Virtual Football English League')", timeout=15000)
-                self.stdout.write("✅ Found league link, clicking...")
-                page.click("a:has-text('Virtual Football English League')")
-            except Exception:
-                self.stdout.write("❌ Could not find English League link")
-
-            page.wait_for_timeout(10000)
-            browser.close()
-
-        if captured:
-            match = re.search(r"stats_season_lastx/(\d+)/", captured[0])
-            if match:
-                season_id = match.group(1)
-                self.stdout.write(f"🎯 Captured season ID: {season_id}")
+            # sent on the courier thread, so a slow webhook never holds up polling
+            self.schedule_delivery()
+
+            seen = self.fetcher.seen
+            with cycle.span("checkpoint"):
+                self.store_checkpoint(category.key, {
+                    "season_id": current_season_id,
+                    "last_season_id": last_season_id,
+                    "feeds": {sid: seen[sid] for sid in season_ids if sid in seen},
+                })
+
+            delay = poll_interval if options.get("fixed_interval") else scheduler.next_delay()
+            return min(delay, lease_ttl / 3) if shard else delay
+
+        try:
+            while True:
+                cycle = self.tracer.start_cycle(category.key)
+                try:
+                    with self.tracer.profile(category.key):
+                        delay = run_cycle(cycle)
+                finally:
+                    self.tracer.end_cycle(cycle)
+                time.sleep(delay)
+        finally:
+            if shard:
+                release_leases(worker_name, category.key)
+
+    def category_checkpoint(self, key):
+        """This worker's saved state for one category (older checkpoints were the default category's)."""
+        if key in self.checkpoint:
+            return self.checkpoint[key]
+        if key == DEFAULT_CATEGORY and "season_id" in self.checkpoint:
+            return self.checkpoint
+        return {}
+
+    def store_checkpoint(self, key, state):
+        """Save one category's state into the worker checkpoint, if it changed."""
+        with self.checkpoint_lock:
+            full = {k: v for k, v in self.checkpoint.items() if isinstance(v, dict) and "season_id" in v}
+            full[key] = state
+            if full != self.checkpoint:
+                WorkerCheckpoint.store(self.worker_name, full)
+                self.checkpoint = json_copy(full)
+
+    def resume_season(self, checkpoint):
+        """Pick up the base season and feed validators a previous run checkpointed, if still active."""
+        season_id = checkpoint.get("season_id")
+        season = Season.objects.filter(season_id=season_id, active=True).first() if season_id else None
+        if season:
+            self.fetcher.seen.update(checkpoint.get("feeds") or {})
+            self.stdout.write(f"♻️ Resuming season {season_id} from checkpoint")
+        return season
+
+    def roll_over(self, category, current_season_id):
+        """Deactivate the category's seasons outside the new generation and activate its base season."""
+        # only active rows are touched, so this stays cheap as history grows; ended_at
+        # starts the clock for streak log compaction of the leagues dropped here
+        Season.objects.filter(category=category.key, active=True).exclude(season_id__in=[
+            str(int(current_season_id) + offset) for offset in category.offsets
+        ]).update(active=False, ended_at=timezone.now())
+
+        season, _ = Season.objects.get_or_create(
+            season_id=str(current_season_id), defaults={"category": category.key}
+        )
+        season.started_at = timezone.now()
+        season.active = True
+        season.save()
+        return season
+
+    def persist_feed(self, season_id, matches, season_data, category=DEFAULT_CATEGORY):
+        """Pipeline writer step for one league; returns the number of new matches."""
+        if not matches:
+            return 0
+        league_obj = self.get_or_create_league(season_data)
+        new_count = self.process_matches_for_season(matches, season_id, league_obj, category)
+        if new_count:
+            self.stdout.write(f"✅ Processed {new_count} match(es) for {league_obj.name} ({season_id})")
+        return new_count
+
+    def active_base_season(self, category=DEFAULT_CATEGORY):
+        """Base season the leader worker last started, while it is still running."""
+        return Season.objects.filter(
+            category=category, active=True
+        ).exclude(started_at=None).order_by("-started_at").first()
+
+    def last_known_season_id(self, category=DEFAULT_CATEGORY):
+        """Base season recorded by the last discovery, if any."""
+        season = Season.objects.filter(category=category).exclude(started_at=None).order_by("-started_at").first()
+        return season.season_id if season else None
+
+    def discover_season_id(self, last_season_id, probe_span, deadline, category=None):
+        """Probe the feed for the next base season, falling back to Playwright."""
+        category = category or Category()
+        if last_season_id:
+            started = time.perf_counter()
+            season_id = self.probe_season_id(
+                last_season_id, probe_span, deadline, category.base_league, group=category.key
+            )
+            DISCOVERY_SECONDS.observe(
+                time.perf_counter() - started,
+                category=category.key, method="probe", outcome="found" if season_id else "missed",
+            )
+            if season_id:
                 return season_id
+        started = time.perf_counter()
+        season_id = self.capture_new_season_id(category)
+        DISCOVERY_SECONDS.observe(
+            time.perf_counter() - started,
+            category=category.key, method="playwright", outcome="found" if season_id else "missed",
+        )
+        return season_id
+
+    def probe_season_id(self, last_season_id, span, deadline, base_league=BASE_LEAGUE_NAME, group=None):
+        """
+        Find the current base season without a browser.
+
+        Season IDs are sequential, so the next base season lies a short way
+        past the last known one. Candidates are fetched concurrently and the
+        lowest one that serves the base league and has not ended wins.
+        """
+        start = int(last_season_id)
+        candidates = [str(start + i) for i in range(span)]
+        self.stdout.write(f"🔭 Probing season IDs {candidates[0]}..{candidates[-1]}")
+        feeds = self.fetcher.fetch_many(candidates, deadline=deadline, conditional=False, group=group)
+
+        for sid in candidates:
+            matches, season_data = feeds.get(sid, (None, None))
+            if not matches or not season_data:
+                continue
+            # equality, since "... English League 2" also contains "... English League"
+            if league_base_name(season_data.get("name")) != base_league:
+                continue
+            if self.season_has_ended(matches):
+                continue
+            self.stdout.write(f"🎯 Probed season ID: {sid}")
+            return sid
 
-        self.stdout.write("⚠️ No season ID captured")
+        self.stdout.write("⚠️ No season ID found by probing")
         return None
 
-    def fetch_all_matches(self, season_id):
-        url = API_FEED_FMT.format(season_id=season_id)
+    def capture_new_season_id(self, category=None):
+        category = category or Category()
+        self.stdout.write(f"🎭 Using Playwright to capture new {category.key} season ID...")
+        # imported here so workers that resume or probe never load Playwright
+        from tracker.utils.playwright_helpers import discover_season_id_via_playwright
+
+        # one browser discovery at a time keeps memory flat with many categories
+        with getattr(self, "discovery_lock", None) or threading.Lock():
+            return discover_season_id_via_playwright(
+                base_url=category.page_url,
+                headless=getattr(self, "headless", True),
+                listen_seconds=20,
+                max_retries=1,
+                click_league_text=category.base_league,
+                log=self.stdout.write,
+            )
+
+    def archive_ended_seasons(self):
+        """Archiver thread: move inactive seasons out of the live tables."""
         try:
-            r = requests.get(url, timeout=10)
-            r.raise_for_status()
-            data = r.json()
+            if archive_pending(log=self.stdout.write):
+                # streak stats gained a season; let cached reports rebuild
+                bump_data_version()
         except Exception as e:
-            self.stdout.write(f"API error {season_id}: {e}")
-            return None, None
-
+            self.stdout.write(f"📦 Archiving failed: {e!r}")
+        finally:
+            connection.close()
+
+    def schedule_delivery(self):
+        """
+        Queue a delivery run if notifications are pending, including ones
+        left by a failed send or another worker, unless one is already
+        waiting on the courier thread.
+        """
+        if not pending_notifications().exists():
+            return
+        with self.delivery_lock:
+            if self.delivery is None or self.delivery.running() or self.delivery.done():
+                self.delivery = self.courier.submit(self.deliver_notifications)
+
+    def deliver_notifications(self):
+        """Courier thread: send pending notifications."""
         try:
-            doc = data.get("doc", [None])[0]
-            if not doc:
-                return None, None
-            season_data = doc.get("data", {}).get("season") or doc.get("data", {})
-            matches = doc.get("data", {}).get("matches", [])
-            return matches, season_data
+            sent = deliver_pending(log=self.stdout.write)
+            if sent:
+                self.stdout.write(f"📣 Sent {sent} notification(s)")
         except Exception as e:
-            self.stdout.write(f"Parse error {season_id}: {e}")
-            return None, None
+            self.stdout.write(f"📭 Delivery failed: {e!r}")
+        finally:
+            connection.close()
+
+    @cached_property
+    def courier(self):
+        # one thread, so delivery runs never overlap
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="courier")
+
+    @cached_property
+    def archiver(self):
+        # one thread, so archive runs never overlap and rollover never waits for one
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="archiver")
+
+    @cached_property
+    def notifier(self):
+        return Notifier()
+
+    @cached_property
+    def tracer(self):
+        return CycleTracer(enabled=False, log=self.stdout.write)
+
+    @cached_property
+    def fetcher(self):
+        return FeedFetcher(
+            max_workers=getattr(self, "max_concurrency", len(RELEVANT_OFFSETS)),
+            log=self.stdout.write,
+            base_url=getattr(self, "feed_base_url", None),
+            rate_limit=getattr(self, "rate_limit", None),
+            per_group=getattr(self, "fetch_share", None),
+        )
+
+    def fetch_all_matches(self, season_id):
+        return self.fetcher.fetch(season_id)
 
     def get_or_create_league(self, season_data):
         """Create or update a League record from season JSON."""
@@ -170,85 +490,125 @@ class Command(BaseCommand):
         return league
 
     @transaction.atomic
-    def process_matches_for_season(self, matches, season_id, league_obj):
-        new_count = 0
-        season_obj, _ = Season.objects.get_or_create(season_id=str(season_id))
-
-        # Mark the season as active
-        season_obj.active = True
-        season_obj.save()
-
-        sorted_matches = sorted(matches, key=lambda x: (x.get("round", 0), x.get("_id", 0)))
-
+    def process_matches_for_season(self, matches, season_id, league_obj, category=DEFAULT_CATEGORY):
+        """
+        Ingest a season's feed with a fixed number of queries.
+
+        Rounds at or below the season's settled-round watermark were fully
+        ingested by an earlier poll and are skipped without being sorted or
+        looked up. For the rest, existing match ids and the season's teams are
+        loaded up front, streaks are applied in memory in (round, match id)
+        order, and the results are written back with one bulk_create and one
+        bulk_update.
+        """
+        # the row lock serialises ingest of a season across workers, so the
+        # existence check and streak updates below cannot double-count
+        season_obj, _ = Season.objects.select_for_update().get_or_create(
+            season_id=str(season_id), defaults={"category": category}
+        )
+        # a late poll of a season the archiver already took (under this same
+        # lock) must not recreate its teams from zero
+        if season_obj.archived_at:
+            return 0
+
+        watermark = season_obj.settled_round
+        new_rounds = [m for m in matches if (m.get("round", 0) or 0) > watermark]
+        settled_up_to, last_round = round_progress(new_rounds, start=watermark)
+
+        # Move the watermark; an inactive season stays inactive, only rollover activates seasons
+        changed_fields = []
+        if settled_up_to > watermark:
+            season_obj.settled_round = settled_up_to
+            changed_fields.append("settled_round")
+        if last_round > season_obj.total_rounds:
+            season_obj.total_rounds = last_round
+            changed_fields.append("total_rounds")
+        if changed_fields:
+            season_obj.save(update_fields=changed_fields)
+
+        sorted_matches = sorted(new_rounds, key=lambda x: (x.get("round", 0), x.get("_id", 0)))
+
+        existing_ids = set(Match.objects.filter(
+            match_id__in=[str(m.get("_id")) for m in sorted_matches]
+        ).values_list("match_id", flat=True))
+
+        settled = []
         for m in sorted_matches:
             mid = str(m.get("_id"))
-            if Match.objects.filter(match_id=mid).exists():
-                continue
-
             res = m.get("result", {})
-            if res.get("home") is None or res.get("away") is None:
+            if mid in existing_ids or res.get("home") is None or res.get("away") is None:
                 continue
-
+            existing_ids.add(mid)
+            settled.append(m)
+
+        if not settled:
+            return 0
+
+        # (name, season) -> Team, creating any team seen for the first time
+        teams = {t.name: t for t in Team.objects.filter(current_season=season_obj)}
+        names = {m["teams"][side]["name"] for m in settled for side in ("home", "away")}
+        missing = names - teams.keys()
+        if missing:
+            Team.objects.bulk_create([
+                Team(name=name, current_season=season_obj, league=league_obj, streak=0)
+                for name in sorted(missing)
+            ])
+            teams = {t.name: t for t in Team.objects.filter(current_season=season_obj)}
+
+        new_matches = []
+        events = []
+        for m in settled:
+            res = m["result"]
             home_name = m["teams"]["home"]["name"]
             away_name = m["teams"]["away"]["name"]
             hg, ag = int(res["home"]), int(res["away"])
+            home, away = teams[home_name], teams[away_name]
 
-            Match.objects.create(
-                match_id=mid,
+            new_matches.append(Match(
+                match_id=str(m.get("_id")),
                 season=season_obj,
                 round_number=m.get("round", 0) or 0,
-                home_team=home_name,
-                away_team=away_name,
+                home_team=home,
+                away_team=away,
                 home_score=hg,
                 away_score=ag,
                 league=league_obj,
                 processed=True,
-            )
-
-            home, _ = Team.objects.get_or_create(
-                name=home_name,
-                current_season=season_obj,
-                defaults={"league": league_obj, "streak": 0}
-            )
-            away, _ = Team.objects.get_or_create(
-                name=away_name,
-                current_season=season_obj,
-                defaults={"league": league_obj, "streak": 0}
-            )
+            ))
 
             # Force correct league
-            if home.league != league_obj:
-                home.league = league_obj
-            if away.league != league_obj:
-                away.league = league_obj
-
-            # Update streaks only
-            if hg == ag:
-                home.streak = 0
-                away.streak = 0
-            else:
-                home.streak = (home.streak or 0) + 1
-                away.streak = (away.streak or 0) + 1
-
-            home.save()
-            away.save()
-            new_count += 1
-
-        return new_count
+            home.league = league_obj
+            away.league = league_obj
+
+            for name, team, scored, conceded in ((home_name, home, hg, ag), (away_name, away, ag, hg)):
+                old = team.streak or 0
+                result = apply_result(team, scored, conceded)
+                events.append(StreakEvent(
+                    season_id=season_obj.season_id,
+                    league_name=league_obj.name,
+                    team_name=name,
+                    match_id=str(m.get("_id")),
+                    round_number=m.get("round", 0) or 0,
+                    result=result,
+                    old_streak=old,
+                    new_streak=team.streak,
+                ))
+
+        Match.objects.bulk_create(new_matches, ignore_conflicts=True)
+        Team.objects.bulk_update(
+            [teams[name] for name in sorted(names)], [*STATE_FIELDS, "league"]
+        )
+        append_events(events)
+        # delivered after commit by deliver_pending; the unique key drops refires
+        notifications = self.notifier.evaluate(season_obj.season_id, league_obj.name, events)
+        if notifications:
+            Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+        return len(new_matches)
 
     def season_has_ended(self, matches):
-        rounds = [m.get("round", 0) for m in matches]
-        if not rounds:
-            return False
-        max_round = max(rounds)
-        if max_round < 30:
-            return False
-        last_round_matches = [m for m in matches if m.get("round", 0) == max_round]
-        return all(
-            m.get("result", {}).get("home") is not None and
-            m.get("result", {}).get("away") is not None
-            for m in last_round_matches
-        )
+        """Season-end check on a raw feed, for seasons with no stored watermark (e.g. probing)."""
+        settled_up_to, last_round = round_progress(matches)
+        return last_round >= Season.MIN_ROUNDS and settled_up_to >= last_round
 
     def clean_up_inactive_data(self):
         """Clean up inactive leagues, seasons, and teams."""
@@ -0,0 +1,230 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; covers a cached page render up to a slow browser discovery
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# counts per tracker cycle (queries issued, rows written)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+# seconds a round settled away from the scheduler's prediction
+ERROR_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        '%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Metric:
+    """A named family of samples keyed by label values, safe to update from any thread."""
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=(), registry=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self.lock = threading.Lock()
+        self.values = {}
+        (registry or REGISTRY).register(self)
+
+    def key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def get(self, **labels):
+        return self.values.get(self.key(labels), 0)
+
+    def samples(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            yield self.name, format_labels(self.labelnames, key), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name}{labels} {value:g}" for name, labels, value in self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    """Cumulative bucket counts plus sum and count, as Prometheus expects."""
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels, registry)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[i] += 1
+            self.values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def get(self, **labels):
+        """(count, sum) observed for these labels."""
+        counts, total = self.values.get(self.key(labels)) or ((), 0.0)
+        return sum(counts), total
+
+    def samples(self):
+        with self.lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self.values.items())
+        for key, (counts, total) in items:
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                running += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                yield f"{self.name}_bucket", format_labels(self.labelnames, key, [("le", le)]), running
+            yield f"{self.name}_sum", format_labels(self.labelnames, key), total
+            yield f"{self.name}_count", format_labels(self.labelnames, key), running
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def render(self):
+        return "\n".join(m.render() for m in self.metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+# worker
+FEED_FETCH_SECONDS = Histogram(
+    "tracker_feed_fetch_seconds",
+    "Feed download time per league, including any wait for the shared rate limit.",
+    ["league"],
+)
+FEED_ERRORS = Counter("tracker_feed_errors_total", "Feed requests that failed (timeouts, HTTP errors).")
+FEED_FETCHES = Counter(
+    "tracker_feed_fetches_total", "Feed fetches per league by outcome (changed, unchanged).", ["league", "outcome"]
+)
+INGEST_LAG_SECONDS = Histogram(
+    "tracker_ingest_lag_seconds",
+    "Upper bound on how long a new result sat in the feed before its Team rows committed: "
+    "from the last poll that did not have it to the commit.",
+    ["league"],
+)
+CYCLE_QUERIES = Histogram(
+    "tracker_cycle_queries", "DB queries issued by the writer per tracker cycle.", ["category"], buckets=COUNT_BUCKETS
+)
+CYCLE_ROWS = Histogram(
+    "tracker_cycle_rows_written", "Match rows written per tracker cycle.", ["category"], buckets=COUNT_BUCKETS
+)
+ROWS_WRITTEN = Counter("tracker_rows_written_total", "Match rows written.", ["category"])
+SETTLE_ERROR_SECONDS = Histogram(
+    "tracker_settle_error_seconds",
+    "How far (either way) an observed round settle landed from the poll scheduler's prediction.",
+    ["category"], buckets=ERROR_BUCKETS,
+)
+SETTLE_LAST_ERROR = Gauge(
+    "tracker_settle_last_error_seconds",
+    "Signed error of the latest predicted settle; positive when the round settled late.",
+    ["category"],
+)
+DISCOVERY_SECONDS = Histogram(
+    "tracker_discovery_seconds", "Season discovery time by method (probe, playwright) and outcome (found, missed).",
+    ["category", "method", "outcome"],
+)
+
+# web
+VIEW_SECONDS = Histogram("tracker_view_seconds", "Time to produce a response, per view.", ["view"])
+CACHE_REQUESTS = Counter(
+    "tracker_cache_requests_total", "Versioned cache lookups by kind (page, api, nav) and result (hit, miss).",
+    ["kind", "result"],
+)
+
+
+class ViewMetricsMiddleware:
+    """Times every request by URL name; works under both WSGI and ASGI without forcing a thread hop."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, started)
+        return response
+
+    def observe(self, request, started):
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unmatched"
+        VIEW_SECONDS.observe(time.perf_counter() - started, view=view)
+
+
+def start_metrics_server(port, host="0.0.0.0", registry=None):
+    """Serve /metrics from a daemon thread, for processes without a web server (the tracker worker)."""
+    registry = registry or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return server
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='season',
+            name='settled_round',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='season',
+            name='total_rounds',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0009_workercheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeagueLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset', models.IntegerField(unique=True)),
+                ('owner', models.CharField(blank=True, default='', max_length=64)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
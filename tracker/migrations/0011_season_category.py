@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0010_leagueleases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaguelease',
+            name='category',
+            field=models.CharField(default='english', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='season',
+            name='category',
+            field=models.CharField(db_index=True, default='english', max_length=32),
+        ),
+        migrations.AlterField(
+            model_name='leaguelease',
+            name='offset',
+            field=models.IntegerField(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='leaguelease',
+            unique_together={('category', 'offset')},
+        ),
+    ]
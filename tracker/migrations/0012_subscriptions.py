@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0011_season_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('reaches', 'Streak reaches threshold'), ('breaks', 'Streak of at least threshold breaks')], default='reaches', max_length=16)),
+                ('threshold', models.PositiveIntegerField(default=5)),
+                ('league_name', models.CharField(blank=True, default='', max_length=255)),
+                ('team_name', models.CharField(blank=True, default='', max_length=100)),
+                ('channel', models.CharField(choices=[('webhook', 'Webhook'), ('email', 'Email'), ('local', 'Local (testing)')], default='webhook', max_length=16)),
+                ('target', models.CharField(help_text='Webhook URL or email address', max_length=500)),
+                ('active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season_id', models.CharField(max_length=64)),
+                ('league_name', models.CharField(max_length=255)),
+                ('team_name', models.CharField(max_length=100)),
+                ('match_id', models.CharField(max_length=128)),
+                ('old_streak', models.IntegerField()),
+                ('new_streak', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('subscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='tracker.subscription')),
+            ],
+            options={
+                'unique_together': {('subscription', 'match_id', 'team_name')},
+            },
+        ),
+    ]
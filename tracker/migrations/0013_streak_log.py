@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:08
+
+from django.db import migrations, models
+
+
+def create_head(apps, schema_editor):
+    apps.get_model("tracker", "StreakLogHead").objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0012_subscriptions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreakEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveBigIntegerField(unique=True)),
+                ('season_id', models.CharField(db_index=True, max_length=64)),
+                ('league_name', models.CharField(max_length=255)),
+                ('team_name', models.CharField(max_length=100)),
+                ('match_id', models.CharField(max_length=128)),
+                ('round_number', models.IntegerField(default=0)),
+                ('result', models.CharField(choices=[('W', 'Win'), ('D', 'Draw'), ('L', 'Loss')], max_length=1)),
+                ('old_streak', models.IntegerField()),
+                ('new_streak', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StreakLogHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_head, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0013_streak_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='season',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='season',
+            index=models.Index(fields=['category', 'active'], name='tracker_sea_categor_7b8e97_idx'),
+        ),
+    ]
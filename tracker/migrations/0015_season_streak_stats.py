@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0014_season_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeasonStreakStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season_id', models.CharField(max_length=64)),
+                ('category', models.CharField(db_index=True, default='english', max_length=32)),
+                ('league_name', models.CharField(max_length=255)),
+                ('next_decisive', models.JSONField(default=list)),
+                ('next_draw', models.JSONField(default=list)),
+                ('broken', models.JSONField(default=list)),
+            ],
+            options={
+                'unique_together': {('season_id', 'league_name')},
+            },
+        ),
+    ]
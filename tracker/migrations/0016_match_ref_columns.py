@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0015_season_streak_stats'),
+    ]
+
+    operations = [
+        # lets a rollback of 0018 re-add the string columns before 0017 refills them
+        migrations.AlterField(
+            model_name='match',
+            name='home_team',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='away_team',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='home_team_ref',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracker.team'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='away_team_ref',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracker.team'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='league_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tracker.league'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:30
+
+from django.db import migrations
+
+from tracker.migrations import _match_refs
+
+
+class Migration(migrations.Migration):
+    # each batch of the copy commits on its own
+    atomic = False
+
+    dependencies = [
+        ('tracker', '0016_match_ref_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(_match_refs.copy_match_refs, _match_refs.copy_match_names),
+    ]
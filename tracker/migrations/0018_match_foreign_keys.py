@@ -0,0 +1,85 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:30
+
+"""
+Swap Match's name columns for the foreign keys 0017 filled.
+
+`fly deploy` runs this from release_command, straight through to the
+latest migration, while the old worker is still running and inserting
+matches by name only. To stay safe under that:
+- On PostgreSQL, Match is locked against writes (reads go on) for the whole
+  migration, so the catch-up copy below sees every row the old worker
+  inserted since 0017 and none can land before the columns are swapped.
+  On SQLite, the copy's first write takes the database write lock with the
+  same effect.
+- The old worker's writes wait on the lock and then fail, as its name
+  columns are gone. Its feed validators are only kept once a write
+  commits, so the new worker fetches those feeds in full and ingests the
+  matches again.
+This is not an online migration: match writes stop until it commits. The
+indexes are built afterwards, without blocking writes, by 0022.
+"""
+from django.db import migrations, models
+import django.db.models.deletion
+
+from tracker.migrations import _match_refs
+
+
+def lock_matches(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        table = schema_editor.quote_name(apps.get_model("tracker", "Match")._meta.db_table)
+        schema_editor.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0017_copy_match_refs'),
+    ]
+
+    operations = [
+        migrations.RunPython(lock_matches, migrations.RunPython.noop),
+        # catch up on matches the old worker inserted after 0017
+        migrations.RunPython(_match_refs.copy_match_refs, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='match',
+            name='home_team',
+        ),
+        migrations.RemoveField(
+            model_name='match',
+            name='away_team',
+        ),
+        migrations.RemoveField(
+            model_name='match',
+            name='league',
+        ),
+        migrations.RenameField(
+            model_name='match',
+            old_name='home_team_ref',
+            new_name='home_team',
+        ),
+        migrations.RenameField(
+            model_name='match',
+            old_name='away_team_ref',
+            new_name='away_team',
+        ),
+        migrations.RenameField(
+            model_name='match',
+            old_name='league_ref',
+            new_name='league',
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='home_team',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='home_matches', to='tracker.team'),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='away_team',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='away_matches', to='tracker.team'),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='league',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='matches', to='tracker.league'),
+        ),
+    ]
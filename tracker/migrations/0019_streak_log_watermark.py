@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0018_match_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='streakloghead',
+            name='compacted_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:46
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0020_notification_claim'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='seasonstreakstats',
+            name='broken',
+        ),
+    ]
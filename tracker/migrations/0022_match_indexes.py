@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class AddIndexOnline(migrations.AddIndex):
+    """
+    AddIndex that builds with CREATE INDEX CONCURRENTLY on PostgreSQL, so
+    ingest keeps writing to Match while it runs; other backends build it as
+    usual. A failed concurrent build leaves an INVALID index behind, which
+    has to be dropped before migrating again.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.add_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.remove_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.remove_index(model, self.index)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('tracker', '0021_drop_streak_stats_broken'),
+    ]
+
+    operations = [
+        AddIndexOnline(
+            model_name='match',
+            index=models.Index(fields=['season', 'round_number'], name='tracker_mat_season__344384_idx'),
+        ),
+        AddIndexOnline(
+            model_name='match',
+            index=models.Index(fields=['home_team', 'season'], name='tracker_mat_home_te_72b977_idx'),
+        ),
+        AddIndexOnline(
+            model_name='match',
+            index=models.Index(fields=['away_team', 'season'], name='tracker_mat_away_te_09a7b4_idx'),
+        ),
+        # (season, round_number) covers lookups by season, so the old index goes once it exists
+        migrations.AlterField(
+            model_name='match',
+            name='season',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='tracker.season'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+"""Batched copy between Match's name columns and its foreign keys, shared by 0017 and 0018."""
+from django.db import models, transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+# match rows converted per transaction
+BATCH_SIZE = 5000
+
+
+def copy_match_refs(apps, schema_editor):
+    """
+    Point every match at its Team and League rows, a batch of ids per
+    transaction so no lock is held for long and ingest keeps running.
+
+    Matches whose team has no row (e.g. deleted by hand) get one, so the
+    new columns can be made non-null. Rows a still-running worker inserts
+    meanwhile are picked up, since batches are taken until none are left.
+    """
+    Match = apps.get_model("tracker", "Match")
+    Team = apps.get_model("tracker", "Team")
+    League = apps.get_model("tracker", "League")
+
+    pending = Match.objects.filter(Q(home_team_ref=None) | Q(away_team_ref=None))
+
+    def team_id(side):
+        return Subquery(Team.objects.filter(
+            current_season=OuterRef("season"), name=OuterRef(side)
+        ).values("id")[:1])
+
+    last_id = 0
+    while True:
+        ids = list(pending.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        batch = Match.objects.filter(id__in=ids)
+        with transaction.atomic():
+            names = set()
+            for season_id, home, away in batch.values_list("season_id", "home_team", "away_team"):
+                names |= {(season_id, home), (season_id, away)}
+            existing = set(Team.objects.filter(
+                current_season_id__in={s for s, _ in names}
+            ).values_list("current_season_id", "name"))
+            Team.objects.bulk_create(
+                [Team(current_season_id=s, name=n) for s, n in sorted(names - existing)], ignore_conflicts=True
+            )
+            batch.update(
+                home_team_ref=team_id("home_team"),
+                away_team_ref=team_id("away_team"),
+            )
+            # the stored string is the League's name; the home team's league settles duplicate names
+            batch.update(league_ref=Coalesce(
+                Subquery(Team.objects.filter(pk=OuterRef("home_team_ref")).values("league")[:1]),
+                Subquery(League.objects.filter(name=OuterRef("league")).order_by("-id").values("id")[:1]),
+                output_field=models.BigIntegerField(),
+            ))
+        last_id = ids[-1]
+
+
+def copy_match_names(apps, schema_editor):
+    """Reverse of copy_match_refs: write the names back into the string columns."""
+    Match = apps.get_model("tracker", "Match")
+    Team = apps.get_model("tracker", "Team")
+    League = apps.get_model("tracker", "League")
+
+    last_id = 0
+    while True:
+        ids = list(Match.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        Match.objects.filter(id__in=ids).update(
+            home_team=Subquery(Team.objects.filter(pk=OuterRef("home_team_ref")).values("name")[:1]),
+            away_team=Subquery(Team.objects.filter(pk=OuterRef("away_team_ref")).values("name")[:1]),
+            league=Subquery(League.objects.filter(pk=OuterRef("league_ref")).values("name")[:1]),
+        )
+        last_id = ids[-1]
@@ -1,6 +1,9 @@
 from django.db import models
 from django.utils import timezone
 
+# category every season belonged to before tracking went multi-category
+DEFAULT_CATEGORY = "english"
+
 class League(models.Model):
     name = models.CharField(max_length=255)
     external_id = models.BigIntegerField(unique=True)  # season id or competition id
@@ -20,10 +23,26 @@ class Season(models.Model):
     started_at = models.DateTimeField(null=True, blank=True)
     ended_at = models.DateTimeField(null=True, blank=True)
     active = models.BooleanField(default=True)
+    category = models.CharField(max_length=32, default=DEFAULT_CATEGORY, db_index=True)
+    # every round up to here is settled and ingested; later polls only look past it
+    settled_round = models.IntegerField(default=0)
+    total_rounds = models.IntegerField(default=0)
+    # set once the season's matches and teams have moved to the on-disk archive
+    archived_at = models.DateTimeField(null=True, blank=True)
+
+    # seasons shorter than this are never considered ended
+    MIN_ROUNDS = 30
+
+    class Meta:
+        indexes = [models.Index(fields=["category", "active"])]
 
     def __str__(self):
         return f"Season {self.season_id}"
 
+    def has_ended(self):
+        """Answered from the watermark: the last round of a full-length season has settled."""
+        return self.total_rounds >= self.MIN_ROUNDS and self.settled_round >= self.total_rounds
+
     def mark_as_inactive(self):
         """Mark the season as inactive."""
         self.active = False
@@ -49,15 +68,175 @@ class Team(models.Model):
 
 class Match(models.Model):
     match_id = models.CharField(max_length=128, unique=True)
-    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name="matches")
+    # the composite indexes below lead with these columns, so they need no index of their own
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name="matches", db_index=False)
     round_number = models.IntegerField(default=0)
-    home_team = models.CharField(max_length=255)
-    away_team = models.CharField(max_length=255)
+    home_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="home_matches", db_index=False)
+    away_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="away_matches", db_index=False)
     home_score = models.IntegerField(null=True, blank=True)
     away_score = models.IntegerField(null=True, blank=True)
-    league = models.CharField(max_length=255, blank=True, null=True)
+    league = models.ForeignKey(League, on_delete=models.SET_NULL, null=True, blank=True, related_name="matches")
     processed = models.BooleanField(default=False)
     fetched_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # a season's matches in play order: ingest, rebuild, archive
+            models.Index(fields=["season", "round_number"]),
+            # a team's matches in a season, from either side
+            models.Index(fields=["home_team", "season"]),
+            models.Index(fields=["away_team", "season"]),
+        ]
+
     def __str__(self):
         return f"Match {self.match_id} r{self.round_number}"
+
+
+class DataVersion(models.Model):
+    """Single-row counter the tracker bumps after every committed ingest."""
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Data version {self.version}"
+
+
+class WorkerCheckpoint(models.Model):
+    """Last state a tracker worker saved, so a restart can resume instead of rediscovering."""
+    name = models.CharField(max_length=64, unique=True)
+    state = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Checkpoint {self.name}"
+
+    @classmethod
+    def load(cls, name):
+        return cls.objects.filter(name=name).values_list("state", flat=True).first() or {}
+
+    @classmethod
+    def store(cls, name, state):
+        cls.objects.update_or_create(name=name, defaults={"state": state})
+
+    @classmethod
+    def heartbeat(cls, name):
+        """Touch the worker's row; recently touched rows count as live workers."""
+        if not cls.objects.filter(name=name).update(updated_at=timezone.now()):
+            cls.objects.get_or_create(name=name)
+
+
+class LeagueLease(models.Model):
+    """Which tracker worker polls a category's league offset, until `expires_at` unless renewed."""
+    category = models.CharField(max_length=32, default=DEFAULT_CATEGORY)
+    offset = models.IntegerField()
+    owner = models.CharField(max_length=64, blank=True, default="")
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("category", "offset")
+
+    def __str__(self):
+        return f"{self.category} offset {self.offset} -> {self.owner or 'unclaimed'}"
+
+
+class Subscription(models.Model):
+    """
+    A standing alert on streaks. League and team are matched by name, since
+    both rows are recreated every season; blank matches any.
+    """
+    REACHES = "reaches"
+    BREAKS = "breaks"
+    KIND_CHOICES = [
+        (REACHES, "Streak reaches threshold"),
+        (BREAKS, "Streak of at least threshold breaks"),
+    ]
+    CHANNEL_CHOICES = [("webhook", "Webhook"), ("email", "Email"), ("local", "Local (testing)")]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES, default=REACHES)
+    threshold = models.PositiveIntegerField(default=5)
+    league_name = models.CharField(max_length=255, blank=True, default="")
+    team_name = models.CharField(max_length=100, blank=True, default="")
+    channel = models.CharField(max_length=16, choices=CHANNEL_CHOICES, default="webhook")
+    target = models.CharField(max_length=500, help_text="Webhook URL or email address")
+    active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        scope = self.team_name or self.league_name or "any team"
+        return f"{scope} {self.kind} {self.threshold} -> {self.channel}"
+
+
+class Notification(models.Model):
+    """
+    Outbox row for one fired subscription, written in the ingest transaction.
+    The unique key makes a re-ingested match fire nothing new.
+    """
+    subscription = models.ForeignKey(Subscription, on_delete=models.CASCADE, related_name="notifications")
+    season_id = models.CharField(max_length=64)
+    league_name = models.CharField(max_length=255)
+    team_name = models.CharField(max_length=100)
+    match_id = models.CharField(max_length=128)
+    old_streak = models.IntegerField()
+    new_streak = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # set while a worker is sending the row, outside any transaction
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("subscription", "match_id", "team_name")
+
+    def __str__(self):
+        return f"{self.team_name} {self.old_streak}->{self.new_streak} for {self.subscription_id}"
+
+
+class StreakEvent(models.Model):
+    """
+    One team's streak change from one match. Append-only: rows are written
+    in the ingest transaction and read by consumers in `seq` order.
+    """
+    RESULT_CHOICES = [("W", "Win"), ("D", "Draw"), ("L", "Loss")]
+
+    seq = models.PositiveBigIntegerField(unique=True)
+    season_id = models.CharField(max_length=64, db_index=True)
+    league_name = models.CharField(max_length=255)
+    team_name = models.CharField(max_length=100)
+    match_id = models.CharField(max_length=128)
+    round_number = models.IntegerField(default=0)
+    result = models.CharField(max_length=1, choices=RESULT_CHOICES)
+    old_streak = models.IntegerField()
+    new_streak = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"#{self.seq} {self.team_name} {self.old_streak}->{self.new_streak}"
+
+
+class StreakLogHead(models.Model):
+    """Last StreakEvent.seq handed out; its row lock keeps appends in commit order."""
+    seq = models.PositiveBigIntegerField(default=0)
+    # highest seq compaction or retention has deleted; cursors below it may have missed events
+    compacted_seq = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Streak log at {self.seq}"
+
+
+class SeasonStreakStats(models.Model):
+    """
+    One closed season's streak counts for one league, indexed by streak length.
+    Written when the season is archived; reports sum these instead of
+    rescanning matches.
+    """
+    season_id = models.CharField(max_length=64)
+    category = models.CharField(max_length=32, default=DEFAULT_CATEGORY, db_index=True)
+    league_name = models.CharField(max_length=255)
+    next_decisive = models.JSONField(default=list)
+    next_draw = models.JSONField(default=list)
+
+    class Meta:
+        unique_together = ("season_id", "league_name")
+
+    def __str__(self):
+        return f"Streak stats {self.league_name} ({self.season_id})"
@@ -0,0 +1,219 @@
+import bisect
+import json
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Notification, Subscription
+
+logger = logging.getLogger(__name__)
+
+# pending notifications are retried on later cycles until this many failed sends
+MAX_ATTEMPTS = 5
+
+# a claimed row not marked sent or failed within this long is claimed again
+CLAIM_TTL = timedelta(minutes=5)
+
+
+class RuleIndex:
+    """
+    Active subscriptions indexed for per-match evaluation.
+
+    Rules are bucketed by (league name, team name) scope, with "" standing
+    for any, and kept as sorted (threshold, subscription id) lists. A streak
+    moving from `old` to `new` is checked against the four scopes that can
+    apply to a team, each with one or two bisections, so the cost per change
+    does not depend on how many rules exist.
+    """
+
+    def __init__(self, subscriptions=()):
+        self.reaches = defaultdict(list)
+        self.breaks = defaultdict(list)
+        for sub in subscriptions:
+            rules = self.reaches if sub.kind == Subscription.REACHES else self.breaks
+            rules[(sub.league_name, sub.team_name)].append((sub.threshold, sub.pk))
+        for rules in (self.reaches, self.breaks):
+            for bucket in rules.values():
+                bucket.sort()
+
+    def __bool__(self):
+        return bool(self.reaches or self.breaks)
+
+    def matches(self, league_name, team_name, old, new):
+        """Ids of the subscriptions a streak change from `old` to `new` fires."""
+        fired = []
+        for scope in ((league_name, team_name), (league_name, ""), ("", team_name), ("", "")):
+            if new > old:
+                bucket = self.reaches.get(scope)
+                if bucket:
+                    # thresholds in (old, new]
+                    lo = bisect.bisect_right(bucket, (old, float("inf")))
+                    hi = bisect.bisect_right(bucket, (new, float("inf")))
+                    fired += [pk for _, pk in bucket[lo:hi]]
+            elif new == 0 and old > 0:
+                bucket = self.breaks.get(scope)
+                if bucket:
+                    # thresholds <= the streak that just ended
+                    hi = bisect.bisect_right(bucket, (old, float("inf")))
+                    fired += [pk for _, pk in bucket[:hi]]
+        return fired
+
+
+class Notifier:
+    """Turns streak changes from an ingest into outbox rows, reloading the rules when they change."""
+
+    def __init__(self):
+        self.index = RuleIndex()
+        self.version = None
+
+    def refresh(self):
+        """Rebuild the index if subscriptions were added, edited or removed; one query otherwise."""
+        version = Subscription.objects.aggregate(n=Count("id"), latest=Max("updated_at"))
+        if version != self.version:
+            self.index = RuleIndex(Subscription.objects.filter(active=True))
+            self.version = version
+
+    def evaluate(self, season_id, league_name, events):
+        """Unsaved Notifications for a league's StreakEvents, in the order they happened."""
+        index = self.index
+        if not index:
+            return []
+        return [
+            Notification(
+                subscription_id=pk, season_id=season_id, league_name=league_name, team_name=e.team_name,
+                match_id=e.match_id, old_streak=e.old_streak, new_streak=e.new_streak,
+            )
+            for e in events
+            for pk in index.matches(league_name, e.team_name, e.old_streak, e.new_streak)
+        ]
+
+
+def message(notification):
+    n = notification
+    if n.new_streak > n.old_streak:
+        return f"🔥 {n.team_name} ({n.league_name}) is on a streak of {n.new_streak}"
+    return f"💔 {n.team_name} ({n.league_name}) streak of {n.old_streak} broke"
+
+
+def payload(notification):
+    n = notification
+    return {
+        "kind": n.subscription.kind,
+        "threshold": n.subscription.threshold,
+        "league": n.league_name,
+        "team": n.team_name,
+        "season_id": n.season_id,
+        "match_id": n.match_id,
+        "old_streak": n.old_streak,
+        "new_streak": n.new_streak,
+        "message": message(n),
+    }
+
+
+class WebhookBackend:
+    """POSTs one JSON body with every notification for a URL."""
+
+    def __init__(self, timeout=10):
+        self.session = requests.Session()
+        self.timeout = timeout
+
+    def send(self, target, notifications):
+        body = {"notifications": [payload(n) for n in notifications]}
+        r = self.session.post(target, data=json.dumps(body), timeout=self.timeout,
+                              headers={"Content-Type": "application/json"})
+        r.raise_for_status()
+
+
+class EmailBackend:
+    """One email per address, listing every notification in the batch."""
+
+    def send(self, target, notifications):
+        lines = [message(n) for n in notifications]
+        subject = lines[0] if len(lines) == 1 else f"{len(lines)} streak alerts"
+        send_mail(subject, "\n".join(lines), getattr(settings, "DEFAULT_FROM_EMAIL", None), [target])
+
+
+class LocalBackend:
+    """Keeps what would have been sent, for tests and local runs."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, target, notifications):
+        self.sent.append((target, [payload(n) for n in notifications]))
+        for n in notifications:
+            logger.info("notify %s: %s", target, message(n))
+
+
+BACKENDS = {
+    "webhook": WebhookBackend(),
+    "email": EmailBackend(),
+    "local": LocalBackend(),
+}
+
+
+def pending_notifications():
+    return Notification.objects.filter(sent_at=None, attempts__lt=MAX_ATTEMPTS)
+
+
+def claim_pending(limit=500):
+    """
+    Claim up to `limit` pending notifications in one short transaction and
+    return them. A claim older than CLAIM_TTL belongs to a worker that died
+    mid-send and is taken over.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = list(
+            pending_notifications().select_for_update(skip_locked=True, of=("self",))
+            .select_related("subscription")
+            .filter(Q(claimed_at=None) | Q(claimed_at__lt=now - CLAIM_TTL))
+            .order_by("id")[:limit]
+        )
+        Notification.objects.filter(pk__in=[n.pk for n in claimed]).update(claimed_at=now)
+    return claimed
+
+
+def deliver_pending(limit=500, backends=None, log=print):
+    """
+    Send pending notifications, one batch per (channel, target).
+
+    Rows are claimed and committed first, so concurrent workers skip them,
+    and are sent with no transaction or lock held. Several rules firing on
+    the same streak change for one target are sent once. A failed batch is
+    released and retried on a later call, up to MAX_ATTEMPTS. Returns the
+    number sent.
+    """
+    backends = backends or BACKENDS
+    batches = defaultdict(list)
+    for n in claim_pending(limit):
+        batches[(n.subscription.channel, n.subscription.target)].append(n)
+
+    sent = 0
+    delivered, failed = [], []
+    for (channel, target), notifications in batches.items():
+        unique = list({(n.team_name, n.match_id): n for n in notifications}.values())
+        try:
+            backends[channel].send(target, unique)
+        except Exception as e:
+            log(f"📭 {channel} delivery to {target} failed: {e}")
+            failed += notifications
+            continue
+        delivered += notifications
+        sent += len(unique)
+
+    now = timezone.now()
+    for n in delivered:
+        n.sent_at = now
+    for n in delivered + failed:
+        n.attempts += 1
+        n.claimed_at = None
+    Notification.objects.bulk_update(delivered + failed, ["sent_at", "claimed_at", "attempts"])
+    return sent
@@ -0,0 +1,97 @@
+from django.db import transaction
+from django.db.models.functions import Length
+
+from .models import Match, Season, Team
+
+STATE_FIELDS = ("streak", "wins", "draws", "losses")
+
+# rows fetched per round trip while streaming a season's matches
+CHUNK_SIZE = 2000
+
+
+def apply_result(team, scored, conceded):
+    """
+    Move a team's state on by one settled match and return the result
+    letter. A draw resets the streak; a win or a loss extends it.
+    """
+    if scored == conceded:
+        team.streak = 0
+        team.draws = (team.draws or 0) + 1
+        return "D"
+    team.streak = (team.streak or 0) + 1
+    if scored > conceded:
+        team.wins = (team.wins or 0) + 1
+        return "W"
+    team.losses = (team.losses or 0) + 1
+    return "L"
+
+
+def settled_matches(season, chunk_size=CHUNK_SIZE):
+    """
+    A season's settled matches in (round, match id) order, streamed in chunks
+    off the (season, round) index. Ids are numeric strings, so ordering by
+    length first keeps them in the numeric order the ingest applies them in.
+    """
+    return (
+        Match.objects.filter(season=season, home_score__isnull=False, away_score__isnull=False)
+        .order_by("round_number", Length("match_id"), "match_id")
+        .values_list("home_team_id", "away_team_id", "home_score", "away_score")
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def rebuild_season(season, apply=True, chunk_size=CHUNK_SIZE):
+    """
+    Recompute every team's streak, wins, draws and losses in `season` from its
+    Match rows in one pass and compare them with the stored Team rows.
+
+    Returns a list of (team name, field, stored, expected) differences; with
+    `apply`, the wrong rows are fixed with one bulk_update. The season row is
+    locked as ingest does, so a running worker waits rather than writing
+    streaks against a half-rebuilt table.
+    """
+    with transaction.atomic():
+        Season.objects.select_for_update().filter(pk=season.pk).first()
+        stored = {t.pk: t for t in Team.objects.filter(current_season=season)}
+        expected = {pk: Team(pk=pk, name=t.name) for pk, t in stored.items()}
+
+        for home, away, hg, ag in settled_matches(season, chunk_size):
+            apply_result(expected[home], hg, ag)
+            apply_result(expected[away], ag, hg)
+
+        diffs = []
+        fixed = []
+        for pk, team in sorted(expected.items(), key=lambda item: item[1].name):
+            current = stored[pk]
+            wrong = [f for f in STATE_FIELDS if getattr(current, f) != getattr(team, f)]
+            diffs += [(team.name, f, getattr(current, f), getattr(team, f)) for f in wrong]
+            if wrong:
+                for f in STATE_FIELDS:
+                    setattr(current, f, getattr(team, f))
+                fixed.append(current)
+
+        if apply and fixed:
+            Team.objects.bulk_update(fixed, STATE_FIELDS)
+    return diffs
+
+
+def rebuild_streaks(seasons=None, apply=True, chunk_size=CHUNK_SIZE, log=print):
+    """
+    Rebuild (or, without `apply`, only verify) the given seasons, defaulting
+    to every season whose matches are still in the live tables. Returns
+    {season id: differences} for the seasons that had any.
+    """
+    if seasons is None:
+        seasons = Season.objects.filter(archived_at=None).order_by("id")
+    found = {}
+    checked = 0
+    for season in seasons:
+        diffs = rebuild_season(season, apply=apply, chunk_size=chunk_size)
+        checked += 1
+        if diffs:
+            found[season.season_id] = diffs
+            teams = len({name for name, *_ in diffs})
+            log(f"{'🔧 Fixed' if apply else '⚠️ Found'} {len(diffs)} wrong value(s) for {teams} team(s) "
+                f"in season {season.season_id}")
+    log(f"🔎 Checked {checked} season(s), {len(found)} with differences")
+    return found
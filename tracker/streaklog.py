@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Season, StreakEvent, StreakLogHead
+
+# ended seasons keep every event this long, then only each team's last one
+COMPACT_AFTER = timedelta(hours=getattr(settings, "TRACKER_STREAK_LOG_COMPACT_HOURS", 6))
+
+# nothing older than this is kept at all
+RETENTION = timedelta(days=getattr(settings, "TRACKER_STREAK_LOG_RETENTION_DAYS", 14))
+
+
+def append_events(events):
+    """
+    Number `events` and insert them; call inside the ingest transaction.
+
+    Sequence numbers come from a single head row updated under its row lock,
+    which is held until the surrounding transaction commits. Appends from
+    concurrent workers therefore commit in `seq` order with no gaps, and a
+    consumer that has read up to some seq can never later see a smaller one.
+    """
+    if not events:
+        return
+    head, _ = StreakLogHead.objects.select_for_update().get_or_create(pk=1)
+    for i, event in enumerate(events, start=head.seq + 1):
+        event.seq = i
+    head.seq += len(events)
+    head.save(update_fields=["seq"])
+    StreakEvent.objects.bulk_create(events)
+
+
+def read_events(after=0, limit=1000):
+    """Up to `limit` events with seq > `after`, oldest first."""
+    return list(StreakEvent.objects.filter(seq__gt=after).order_by("seq")[:limit])
+
+
+def compacted_through():
+    """
+    A consumer whose cursor is below this may have missed events. Compaction
+    leaves holes inside the kept range, so this is the highest seq ever
+    deleted rather than the oldest one kept; the latter still counts for
+    rows deleted before the watermark was recorded.
+    """
+    watermark = StreakLogHead.objects.filter(pk=1).values_list("compacted_seq", flat=True).first() or 0
+    oldest = StreakEvent.objects.order_by("seq").values_list("seq", flat=True).first()
+    return max(watermark, oldest - 1 if oldest else 0)
+
+
+def compact_streak_log(now=None):
+    """
+    Apply the retention policy, returning (compacted, expired) row counts.
+
+    Events of seasons that ended more than COMPACT_AFTER ago are reduced to
+    the last event per team, which still carries its final streak; events
+    older than RETENTION are dropped.
+    """
+    now = now or timezone.now()
+    # seasons deactivated by older rollovers have no ended_at; their archive time stands in
+    ended_at = Coalesce("ended_at", "archived_at")
+    ended = Season.objects.filter(active=False).alias(ended=ended_at).filter(
+        ended__lt=now - COMPACT_AFTER, ended__gte=now - RETENTION
+    ).values_list("season_id", flat=True)
+    in_ended = StreakEvent.objects.filter(season_id__in=ended)
+    keep = in_ended.values("season_id", "team_name").annotate(last=Max("seq")).values("last")
+    doomed = in_ended.exclude(seq__in=keep) | StreakEvent.objects.filter(created_at__lt=now - RETENTION)
+    last = doomed.aggregate(last=Max("seq"))["last"]
+    with transaction.atomic():
+        # committed with the deletes, so no reader sees a hole without the watermark
+        if last:
+            StreakLogHead.objects.filter(pk=1, compacted_seq__lt=last).update(compacted_seq=last)
+        compacted, _ = in_ended.exclude(seq__in=keep).delete()
+        expired, _ = StreakEvent.objects.filter(created_at__lt=now - RETENTION).delete()
+    return compacted, expired
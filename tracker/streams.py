@@ -0,0 +1,109 @@
+import asyncio
+import json
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+
+from .cache import current_data_version
+from .models import Team
+
+# how often the broadcaster looks for a new data version
+POLL_SECONDS = 2
+
+# comment line sent when nothing changed, so proxies keep idle streams open
+HEARTBEAT_SECONDS = 15
+
+# streams end after this long and EventSource reconnects, bounding any stream
+# whose client vanished without the server noticing
+STREAM_MAX_SECONDS = 300
+
+
+def team_rows(league_id):
+    return {
+        t["id"]: t for t in Team.objects.filter(
+            league_id=league_id, current_season__active=True
+        ).values("id", "name", "streak", "wins", "draws")
+    }
+
+
+class LeagueBroadcaster:
+    """
+    In-process pub/sub for per-league streak changes.
+
+    One task per process watches the data version the tracker bumps after
+    each ingest. On a change it reloads the teams of every league that has
+    viewers, diffs them against the last snapshot, and hands only the changed
+    rows to each subscriber's queue. Viewers cost a queue, not a query.
+    """
+
+    def __init__(self, poll_seconds=POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.subscribers = defaultdict(set)   # league_id -> {asyncio.Queue}
+        self.snapshots = {}                   # league_id -> {team_id: row}
+        self.version = None
+        self.task = None
+
+    async def subscribe(self, league_id):
+        """Return (queue, current rows) for a new viewer of `league_id`."""
+        if league_id not in self.snapshots:
+            self.snapshots[league_id] = await sync_to_async(team_rows)(league_id)
+        queue = asyncio.Queue()
+        self.subscribers[league_id].add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return queue, list(self.snapshots[league_id].values())
+
+    def unsubscribe(self, league_id, queue):
+        self.subscribers[league_id].discard(queue)
+        if not self.subscribers[league_id]:
+            del self.subscribers[league_id]
+            self.snapshots.pop(league_id, None)
+
+    async def run(self):
+        while self.subscribers:
+            version = await sync_to_async(current_data_version)()
+            if version != self.version:
+                self.version = version
+                for league_id in list(self.subscribers):
+                    await self.publish(league_id, version)
+            await asyncio.sleep(self.poll_seconds)
+
+    async def publish(self, league_id, version):
+        rows = await sync_to_async(team_rows)(league_id)
+        previous = self.snapshots.get(league_id, {})
+        changed = [row for team_id, row in rows.items() if previous.get(team_id) != row]
+        removed = [team_id for team_id in previous if team_id not in rows]
+        if league_id not in self.subscribers:
+            return  # the last viewer left while rows were loading
+        self.snapshots[league_id] = rows
+        if not changed and not removed:
+            return
+        message = {"version": version, "teams": changed, "removed": removed}
+        for queue in self.subscribers.get(league_id, ()):
+            queue.put_nowait(message)
+
+
+broadcaster = LeagueBroadcaster()
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def league_events(league_id):
+    """Async SSE body: a full snapshot first, then only the teams that changed."""
+    queue, rows = await broadcaster.subscribe(league_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_MAX_SECONDS
+    try:
+        yield "retry: 2000\n\n"
+        yield sse_event("snapshot", {"version": broadcaster.version, "teams": rows, "removed": []})
+        while loop.time() < deadline:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield sse_event("teams", message)
+    finally:
+        broadcaster.unsubscribe(league_id, queue)
@@ -1,3 +1,962 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.analytics import MAX_STREAK
+from tracker.archive import ArchiveReader, archive_pending
+from tracker.management.commands import backfill
+from tracker.management.commands.run_tracker import BASE_LEAGUE_NAME, Command
+from tracker.cache import bump_data_version
+from tracker.metrics import (
+    CACHE_REQUESTS, REGISTRY, SETTLE_ERROR_SECONDS, SETTLE_LAST_ERROR, Counter, Histogram, Registry,
+)
+from tracker.models import (
+    League, LeagueLease, Match, Notification, Season, StreakEvent, Subscription, Team, WorkerCheckpoint,
+)
+from tracker.notifications import CLAIM_TTL, LocalBackend, RuleIndex, deliver_pending
+from tracker.rebuild import rebuild_streaks
+from tracker.streams import LeagueBroadcaster
+from tracker.streaklog import compact_streak_log
+from tracker.utils.benchmark import run_ingest_benchmark
+from tracker.utils.categories import Category, load_categories
+from tracker.utils.feeds import FeedFetcher, RateLimiter, settled_round
+from tracker.utils.leases import claim_leases, ensure_leases, worker_identity
+from tracker.utils.pipeline import IngestPipeline
+from tracker.utils.replay import ReplayFeed, make_replay_server
+from tracker.utils.scheduler import PollScheduler
+from tracker.utils.synthetic import synthetic_season
+from tracker.utils.tracing import CycleTracer
+
+
+def feed_match(match_id, round_number, home, away, hg=None, ag=None):
+    """One entry of doc[0].data.matches as served by stats_season_lastx."""
+    return {
+        "_id": match_id,
+        "round": round_number,
+        "teams": {"home": {"name": home}, "away": {"name": away}},
+        "result": {"home": hg, "away": ag},
+    }
+
+
+def feed_document(matches, name=BASE_LEAGUE_NAME, season_id=1):
+    """A whole stats_season_lastx response wrapping `matches`."""
+    return {"doc": [{"data": {"season": {"_id": season_id, "name": name}, "matches": matches}}]}
+
+
+def feed_rounds(teams, rounds, start_id=1000):
+    """Round-robin-ish settled matches where every fifth fixture is a draw."""
+    matches = []
+    mid = start_id
+    for r in range(1, rounds + 1):
+        rotated = teams[r % len(teams):] + teams[:r % len(teams)]
+        for i in range(0, len(rotated) - 1, 2):
+            hg, ag = (1, 1) if mid % 5 == 0 else (2, 0)
+            matches.append(feed_match(mid, r, rotated[i], rotated[i + 1], hg, ag))
+            mid += 1
+    return matches
+
+
+class ProcessMatchesTests(TestCase):
+    def setUp(self):
+        self.command = Command(stdout=StringIO())
+        self.league = League.objects.create(name="Virtual Football English League", external_id=1)
+
+    def test_streaks_follow_results_in_round_order(self):
+        matches = [
+            feed_match(3, 2, "A", "B", 1, 1),
+            feed_match(1, 1, "A", "B", 2, 0),
+            feed_match(2, 1, "C", "D", 0, 3),
+            feed_match(4, 2, "C", "D", 1, 0),
+            feed_match(5, 3, "A", "C"),  # not settled yet
+        ]
+        created = self.command.process_matches_for_season(matches, "500", self.league)
+
+        self.assertEqual(created, 4)
+        streaks = dict(Team.objects.values_list("name", "streak"))
+        self.assertEqual(streaks, {"A": 0, "B": 0, "C": 2, "D": 2})
+        self.assertFalse(Match.objects.filter(match_id="5").exists())
+
+        # Re-ingesting the same payload is a no-op
+        self.assertEqual(self.command.process_matches_for_season(matches, "500", self.league), 0)
+        self.assertEqual(dict(Team.objects.values_list("name", "streak")), streaks)
+
+    def test_query_count_does_not_grow_with_matches(self):
+        teams = [f"Team {i}" for i in range(20)]
+        small = feed_rounds(teams, 2)
+        large = feed_rounds(teams, 30, start_id=5000)
+
+        with CaptureQueriesContext(connection) as small_ctx:
+            self.command.process_matches_for_season(small, "600", self.league)
+        with CaptureQueriesContext(connection) as large_ctx:
+            self.command.process_matches_for_season(large, "601", self.league)
+
+        self.assertEqual(Match.objects.count(), len(small) + len(large))
+
+        # Only the match and streak event INSERTs are split into backend-sized batches
+        def statements(ctx):
+            return [q["sql"] for q in ctx.captured_queries
+                    if "tracker_match\" (" not in q["sql"] and "tracker_streakevent\" (" not in q["sql"]]
+
+        self.assertEqual(len(statements(small_ctx)), len(statements(large_ctx)))
+        self.assertLessEqual(len(statements(large_ctx)), 16)
+
+    def test_watermark_skips_settled_rounds_and_answers_season_end(self):
+        teams = ["A", "B", "C", "D"]
+        partial = feed_rounds(teams, 29) + [feed_match(1, 30, "A", "B"), feed_match(2, 30, "C", "D")]
+        self.command.process_matches_for_season(partial, "650", self.league)
+        season = Season.objects.get(season_id="650")
+        self.assertEqual((season.settled_round, season.total_rounds), (29, 30))
+        self.assertFalse(season.has_ended())
+
+        # rounds below the watermark are ignored even if the feed disagrees with history
+        rewritten = [dict(m, _id=m["_id"] + 50000) for m in feed_rounds(teams, 29)]
+        final = rewritten + [feed_match(1, 30, "A", "B", 1, 0), feed_match(2, 30, "C", "D", 0, 0)]
+        self.assertEqual(self.command.process_matches_for_season(final, "650", self.league), 2)
+        season.refresh_from_db()
+        self.assertTrue(season.has_ended())
+        self.assertTrue(self.command.season_has_ended(final))
+
+    def test_late_poll_does_not_reactivate_rolled_over_season(self):
+        teams = ["A", "B", "C", "D"]
+        self.command.process_matches_for_season(feed_rounds(teams, 2), "660", self.league)
+        Season.objects.filter(season_id="660").update(active=False)
+        self.assertEqual(self.command.process_matches_for_season(feed_rounds(teams, 3), "660", self.league), 2)
+        season = Season.objects.get(season_id="660")
+        self.assertFalse(season.active)
+        self.assertEqual(season.settled_round, 3)
+
+
+class RebuildStreaksTests(TestCase):
+    def test_replay_restores_corrupted_team_rows(self):
+        command = Command(stdout=StringIO())
+        league = League.objects.create(name="Virtual Football League 5", external_id=5)
+        command.process_matches_for_season(feed_rounds(["A", "B", "C", "D", "E", "F"], 8), "970", league)
+        good = {t.name: (t.streak, t.wins, t.draws, t.losses) for t in Team.objects.all()}
+        self.assertEqual(sum(w + d + l for _, w, d, l in good.values()), 2 * Match.objects.count())
+        self.assertEqual(rebuild_streaks(apply=False, log=lambda msg: None), {})
+
+        # a double-applied cycle and a half-reset row
+        Team.objects.filter(name="A").update(streak=F("streak") + 3, wins=0)
+        Team.objects.filter(name="B").update(streak=0, draws=0, losses=0)
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("rebuild_streaks", "--verify", "--chunk-size", "5", stdout=out)
+        self.assertIn("970 A: streak", out.getvalue())
+        self.assertIn("970 B: draws", out.getvalue())
+        self.assertEqual(Team.objects.get(name="A").wins, 0)
+
+        call_command("rebuild_streaks", "--chunk-size", "5", stdout=StringIO())
+        self.assertEqual({t.name: (t.streak, t.wins, t.draws, t.losses) for t in Team.objects.all()}, good)
+        self.assertEqual(rebuild_streaks(apply=False, log=lambda msg: None), {})
+
+
+class BackfillTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.checkpoint = f"{root}/backfill.json"
+        self.league = League.objects.create(name="Virtual Football League 6", external_id=6)
+        command = Command(stdout=StringIO())
+        for i, sid in enumerate(("980", "981", "982")):
+            command.process_matches_for_season(feed_rounds(["A", "B", "C", "D"], 2, start_id=1000 * (i + 1)), sid, self.league)
+        # 981 keeps one team with a league; 982's matches lost theirs too
+        Team.objects.exclude(current_season__season_id="981", name="A").update(league=None)
+        Match.objects.filter(season__season_id="982").update(league=None)
+
+    def backfill(self, *args):
+        out = StringIO()
+        call_command("backfill", "--batch-size", "3", "--checkpoint", self.checkpoint, *args, stdout=out)
+        return out.getvalue()
+
+    def test_batches_resume_and_dry_run(self):
+        self.assertIn("Would backfill league for 7 teams", self.backfill("--dry-run"))
+        self.assertEqual(Team.objects.filter(league=None).count(), 11)
+
+        # a run interrupted after its first batch picks up where it stopped
+        store = backfill.Command.store_checkpoint
+
+        def store_and_stop(command, path, last_id):
+            store(command, path, last_id)
+            raise KeyboardInterrupt
+
+        with mock.patch.object(backfill.Command, "store_checkpoint", store_and_stop):
+            with self.assertRaises(KeyboardInterrupt):
+                self.backfill()
+        self.assertEqual(Team.objects.filter(league=None).count(), 8)
+        output = self.backfill()
+        self.assertIn("Resuming after team id", output)
+        self.assertIn("Backfilled league for 4 teams", output)
+
+        self.assertEqual(set(Team.objects.filter(league=None).values_list("current_season__season_id", flat=True)), {"982"})
+        self.assertFalse(Team.objects.exclude(league=None).exclude(league=self.league).exists())
+        self.assertIn("Backfilled league for 0 teams", self.backfill())
+
+
+class ProbeSeasonIdTests(TestCase):
+    def test_picks_lowest_running_base_league_season(self):
+        teams = ["A", "B", "C", "D"]
+        ended = feed_rounds(teams, 30)
+        running = feed_rounds(teams, 3) + [feed_match(1, 4, "A", "B")]
+        feeds = {
+            "100": (ended, {"name": f"{BASE_LEAGUE_NAME} 24363"}),
+            "101": (running, {"name": "Virtual Football Spanish League 24364"}),
+            # the old generation's League 2 outlives its base; its name contains the base name
+            "102": (running, {"name": f"{BASE_LEAGUE_NAME} 2 2150"}),
+            "108": (running, {"name": f"{BASE_LEAGUE_NAME} 24371"}),
+            "116": (running, {"name": BASE_LEAGUE_NAME}),
+        }
+        command = Command(stdout=StringIO())
+        with mock.patch.object(command.fetcher, "fetch_many", return_value=feeds) as fetch_many:
+            self.assertEqual(command.probe_season_id("100", span=32, deadline=5), "108")
+
+        self.assertEqual(len(fetch_many.call_args.args[0]), 32)
+        self.assertIs(fetch_many.call_args.kwargs["conditional"], False)
+
+
+class PollSchedulerTests(TestCase):
+    def test_polls_fast_only_around_expected_settle(self):
+        now = [0.0]
+        scheduler = PollScheduler(default_interval=10, min_interval=2, max_interval=60,
+                                  window=15, clock=lambda: now[0])
+        teams = ["A", "B", "C", "D"]
+
+        scheduler.observe("1", feed_rounds(teams, 3))
+        self.assertEqual(scheduler.next_delay(), 10)
+
+        for t, rounds in ((50, 4), (230, 5)):
+            now[0] = t
+            scheduler.observe("1", feed_rounds(teams, rounds))
+        self.assertEqual(scheduler.cadence["1"], 180)
+        self.assertEqual(scheduler.next_delay(), 60)
+
+        now[0] = 400
+        self.assertEqual(scheduler.next_delay(), 2)
+
+        count, total = SETTLE_ERROR_SECONDS.get(category="tracker")
+        now[0] = 420
+        scheduler.observe("1", feed_rounds(teams, 6))
+        self.assertEqual(scheduler.last_error, 10)
+        self.assertEqual(SETTLE_ERROR_SECONDS.get(category="tracker"), (count + 1, total + 10))
+        self.assertEqual(SETTLE_LAST_ERROR.get(category="tracker"), 10)
+        self.assertIn('tracker_settle_last_error_seconds{category="tracker"} 10', REGISTRY.render())
+
+
+class CachedLeaguePageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.season = Season.objects.create(season_id="700")
+        self.league = League.objects.create(name="Virtual Football English League", external_id=700)
+        self.team = Team.objects.create(name="London Reds", current_season=self.season,
+                                        league=self.league, streak=3)
+
+    def test_page_is_served_from_cache_until_version_bump(self):
+        url = reverse("league-detail", args=[self.league.id])
+        self.assertContains(self.client.get(url), "London Reds")
+
+        Team.objects.filter(pk=self.team.pk).update(name="London Blues")
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(url), "London Reds")
+
+        bump_data_version()
+        self.assertContains(self.client.get(url), "London Blues")
+
+    def test_unknown_league_is_not_cached(self):
+        url = reverse("league-detail", args=[999])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class LeagueBroadcasterTests(TestCase):
+    async def test_publishes_only_changed_teams(self):
+        season = await Season.objects.acreate(season_id="800")
+        league = await League.objects.acreate(name="Virtual Football Spanish League", external_id=800)
+        reds = await Team.objects.acreate(name="Reds", current_season=season, league=league, streak=1)
+        await Team.objects.acreate(name="Blues", current_season=season, league=league, streak=2)
+
+        broadcaster = LeagueBroadcaster()
+        broadcaster.task = asyncio.get_running_loop().create_future()  # keep run() from starting
+        queue, rows = await broadcaster.subscribe(league.id)
+        self.assertEqual(len(rows), 2)
+
+        await Team.objects.filter(pk=reds.pk).aupdate(streak=2)
+        await broadcaster.publish(league.id, version=5)
+        message = queue.get_nowait()
+        self.assertEqual(message["version"], 5)
+        self.assertEqual([t["name"] for t in message["teams"]], ["Reds"])
+
+        await broadcaster.publish(league.id, version=6)
+        self.assertTrue(queue.empty())
+
+        broadcaster.unsubscribe(league.id, queue)
+        self.assertEqual(broadcaster.snapshots, {})
+
+
+class LeagueApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        season = Season.objects.create(season_id="900")
+        self.league = League.objects.create(name="Virtual Football Italian League", external_id=900)
+        Team.objects.create(name="Milan Red", current_season=season, league=self.league, streak=1)
+        Team.objects.create(name="Milan Blue", current_season=season, league=self.league, streak=4)
+
+    def test_teams_are_column_oriented_and_revalidate_with_etag(self):
+        url = reverse("api-league-teams", args=[self.league.id])
+        response = self.client.get(url)
+        self.assertEqual(response.json()["name"], ["Milan Blue", "Milan Red"])
+        self.assertEqual(response.json()["streak"], [4, 1])
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+        bump_data_version()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_league_list(self):
+        data = self.client.get(reverse("api-leagues")).json()
+        self.assertEqual(data["external_id"], [900])
+
+
+class ReplayFeedTests(TestCase):
+    def test_replays_rounds_over_http_with_revalidation(self):
+        now = [0.0]
+        seasons = {"10": feed_document(feed_rounds(["A", "B", "C", "D"], 30))}
+        feed = ReplayFeed(seasons, round_seconds=180, speed=60, clock=lambda: now[0])
+        server = make_replay_server(feed, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        fetcher = FeedFetcher(max_workers=1, log=lambda msg: None,
+                              base_url=f"http://127.0.0.1:{server.server_port}")
+        self.addCleanup(fetcher.close)
+
+        now[0] = 3 * 180 / 60
+        matches, season_data = fetcher.fetch("10")
+        self.assertEqual(settled_round(matches), 3)
+        self.assertEqual(season_data["name"], BASE_LEAGUE_NAME)
+        fetcher.commit("10")
+
+        # same virtual round: the server answers 304
+        self.assertEqual(fetcher.fetch("10"), (None, None))
+
+        now[0] = 100
+        self.assertEqual(settled_round(fetcher.fetch("10")[0]), 30)
+        self.assertEqual(fetcher.fetch("11"), (None, None))
+
+
+class IngestBenchmarkTests(TestCase):
+    def test_reports_every_synthetic_match(self):
+        results = run_ingest_benchmark(Command(stdout=StringIO()), leagues=2, teams=4, rounds=3)
+        self.assertEqual([r["scenario"] for r in results], ["full_season", "round_by_round"])
+        for r in results:
+            self.assertEqual(r["matches"], 2 * 2 * 3)
+            self.assertGreater(r["queries_per_match"], 0)
+
+
+class WorkerCheckpointTests(TestCase):
+    def test_resumes_active_season_and_feed_validators(self):
+        Season.objects.create(season_id="300", active=True)
+        feeds = {"300": {"etag": '"abc"', "last_modified": None, "digest": "d1"}}
+        WorkerCheckpoint.store("tracker", {"season_id": "300", "last_season_id": "292", "feeds": feeds})
+
+        command = Command(stdout=StringIO())
+        season = command.resume_season(WorkerCheckpoint.load("tracker"))
+        self.assertEqual(season.season_id, "300")
+        self.assertEqual(command.fetcher.seen, feeds)
+
+    def test_ignores_checkpoint_of_ended_season(self):
+        Season.objects.create(season_id="300", active=False)
+        command = Command(stdout=StringIO())
+        self.assertIsNone(command.resume_season({"season_id": "300", "feeds": {"300": {}}}))
+        self.assertEqual(command.fetcher.seen, {})
+
+
+class IngestPipelineTests(TestCase):
+    def test_writes_changed_feeds_and_commits_their_validators(self):
+        league_docs = {
+            "20": feed_document(feed_rounds(["A", "B"], 2, start_id=1), season_id=20),
+            "21": feed_document(feed_rounds(["C", "D"], 3, start_id=100), season_id=21),
+        }
+
+        def fetch_raw(sid, conditional=True):
+            if sid not in league_docs:
+                return None  # e.g. a 304
+            fetcher.pending[sid] = {"digest": sid}
+            return json.dumps(league_docs[sid]).encode()
+
+        fetcher = FeedFetcher(max_workers=2, log=lambda msg: None)
+        self.addCleanup(fetcher.close)
+        command = Command(stdout=StringIO())
+        pipeline = IngestPipeline(fetcher, command.persist_feed, queue_size=1, batch_size=8)
+
+        with mock.patch.object(fetcher, "fetch_raw", side_effect=fetch_raw):
+            feeds, new_counts, timings = pipeline.run(["20", "21", "22"], deadline=5)
+
+        self.assertEqual(sorted(feeds), ["20", "21"])
+        self.assertEqual(new_counts, {"20": 2, "21": 3})
+        self.assertEqual(sorted(fetcher.seen), ["20", "21"])
+        self.assertEqual(timings["fetch"]["items"], 3)
+        self.assertEqual(timings["parse"]["items"], 2)
+        self.assertEqual(Match.objects.count(), 5)
+
+
+class FeedValidatorTests(TestCase):
+    def response(self, status, body=b"", etag=None):
+        return mock.Mock(status_code=status, content=body, headers={"ETag": etag} if etag else {},
+                         raise_for_status=lambda: None)
+
+    def test_not_modified_and_identical_bodies_are_skipped(self):
+        fetcher = FeedFetcher(max_workers=1, log=lambda msg: None)
+        self.addCleanup(fetcher.close)
+        body = json.dumps(feed_document(feed_rounds(["A", "B"], 1))).encode()
+
+        with mock.patch.object(fetcher.session, "get") as get:
+            get.return_value = self.response(200, body, etag='"v1"')
+            self.assertEqual(fetcher.fetch_raw("10"), body)
+            self.assertEqual(fetcher.seen, {})
+            self.assertEqual(fetcher.pending["10"]["etag"], '"v1"')
+            fetcher.commit("10")
+            self.assertEqual(fetcher.seen["10"]["etag"], '"v1"')
+            self.assertEqual(fetcher.pending, {})
+
+            get.return_value = self.response(304)
+            self.assertIsNone(fetcher.fetch_raw("10"))
+            self.assertEqual(get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+
+            # a server without working validators: same bytes under a new ETag
+            get.return_value = self.response(200, body, etag='"v2"')
+            self.assertIsNone(fetcher.fetch_raw("10"))
+            self.assertEqual(fetcher.pending, {})
+            self.assertEqual(fetcher.seen["10"]["etag"], '"v1"')
+
+            # an unconditional fetch (the season probe) sends no validators and takes the body
+            self.assertEqual(fetcher.fetch_raw("10", conditional=False), body)
+            self.assertEqual(get.call_args.kwargs["headers"], {})
+
+    def test_validators_move_to_seen_only_after_their_batch_commits(self):
+        docs = {
+            "20": feed_document(feed_rounds(["A", "B"], 2, start_id=1), season_id=20),
+            "21": feed_document(feed_rounds(["C", "D"], 2, start_id=100), season_id=21),
+        }
+        fetcher = FeedFetcher(max_workers=2, log=lambda msg: None)
+        self.addCleanup(fetcher.close)
+        command = Command(stdout=StringIO())
+        seen_while_writing = []
+
+        def persist(sid, matches, season_data):
+            seen_while_writing.append(sid in fetcher.seen)
+            if sid == "21":
+                raise ValueError("constraint violated")
+            return command.persist_feed(sid, matches, season_data)
+
+        def fetch_raw(sid, conditional=True):
+            fetcher.pending[sid] = {"digest": sid}
+            return json.dumps(docs[sid]).encode()
+
+        pipeline = IngestPipeline(fetcher, persist, batch_size=8, log=lambda msg: None)
+        with mock.patch.object(fetcher, "fetch_raw", side_effect=fetch_raw):
+            pipeline.run(["20", "21"], deadline=5)
+
+        self.assertEqual(seen_while_writing, [False, False])
+        self.assertEqual(list(fetcher.seen), ["20"])
+        # the failed league keeps its payload pending, so the next poll fetches it in full
+        self.assertEqual(list(fetcher.pending), ["21"])
+        self.assertFalse(Match.objects.filter(season__season_id="21").exists())
+
+
+class CycleDeadlineTests(TestCase):
+    def test_late_feed_is_dropped_and_base_payload_reused_for_season_end(self):
+        Season.objects.create(season_id="100", active=True, started_at=timezone.now())
+        docs = {
+            "100": feed_document(feed_rounds(["A", "B", "C", "D"], 30), season_id=100),
+            "101": feed_document(feed_rounds(["E", "F"], 2, start_id=3000), name="League 1", season_id=101),
+            "102": feed_document(feed_rounds(["G", "H"], 2, start_id=4000), name="League 2", season_id=102),
+        }
+        release = threading.Event()
+        self.addCleanup(release.set)
+        calls = []
+
+        def fetch_raw(sid, conditional=True):
+            calls.append(sid)
+            if sid == "101":
+                release.wait(5)  # still downloading when the cycle gives up on it
+            return json.dumps(docs[sid]).encode() if sid in docs else None
+
+        command = Command(stdout=StringIO())
+        command.options = {"cycle_deadline": 0.5}
+        command.worker_name = "tracker"
+        command.checkpoint = {"english": {"season_id": "100", "last_season_id": "92", "feeds": {}}}
+        command.checkpoint_lock = threading.Lock()
+        command.delivery_lock = threading.Lock()
+        command.delivery = None
+        self.addCleanup(command.fetcher.close)
+
+        class Stop(Exception):
+            pass
+
+        with mock.patch.object(command.fetcher, "fetch_raw", side_effect=fetch_raw), \
+                mock.patch.object(Command, "archiver", mock.Mock()), \
+                mock.patch("tracker.management.commands.run_tracker.time.sleep", side_effect=Stop):
+            with self.assertRaises(Stop):
+                command.track_category(load_categories(["english"])[0])
+
+        self.assertIn("101", command.stdout.getvalue())
+        self.assertEqual(set(Match.objects.values_list("season__season_id", flat=True)), {"100", "102"})
+        self.assertFalse(Match.objects.filter(season__season_id="101").exists())
+        # the season-end check read the payload the pipeline already fetched
+        self.assertEqual(calls.count("100"), 1)
+        self.assertFalse(Season.objects.get(season_id="100").active)
+
+
+class CycleTracerTests(TestCase):
+    def test_pipeline_spans_land_in_ring_buffer_and_chrome_trace(self):
+        doc = json.dumps(feed_document(feed_rounds(["A", "B"], 2, start_id=1), season_id=30)).encode()
+        fetcher = FeedFetcher(max_workers=2, log=lambda msg: None)
+        self.addCleanup(fetcher.close)
+        pipeline = IngestPipeline(fetcher, Command(stdout=StringIO()).persist_feed)
+        tracer = CycleTracer(capacity=2, log=lambda msg: None)
+
+        with mock.patch.object(fetcher, "fetch_raw", return_value=doc):
+            for _ in range(3):
+                cycle = tracer.start_cycle("english")
+                pipeline.run(["30"], deadline=5, labels={"30": "english:0"}, trace=cycle)
+                tracer.end_cycle(cycle)
+
+        cycles = tracer.as_json()
+        self.assertEqual([c["cycle"] for c in cycles], [2, 3])
+        names = [span["name"] for span in cycles[0]["spans"]]
+        self.assertEqual(sorted(names), ["fetch", "parse", "persist", "write"])
+        self.assertEqual(cycles[0]["spans"][0]["args"], {"league": "english:0"})
+
+        events = tracer.chrome_trace()["traceEvents"]
+        complete = [e for e in events if e["ph"] == "X"]
+        self.assertEqual(len(complete), 2 * 5)
+        self.assertTrue(all(e["dur"] >= 0 for e in complete))
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = CycleTracer(enabled=False)
+        cycle = tracer.start_cycle("english")
+        with cycle.span("fetch"):
+            pass
+        tracer.end_cycle(cycle)
+        self.assertEqual(tracer.as_json(), [])
+
+
+class LeagueLeaseTests(TestCase):
+    offsets = list(range(8))
+
+    def setUp(self):
+        ensure_leases(self.offsets)
+
+    def test_workers_split_offsets_and_take_over_expired_leases(self):
+        self.assertEqual(claim_leases("a", self.offsets, ttl=60), self.offsets)
+
+        # b joins: it waits for a to shed its surplus on a's next renewal
+        self.assertEqual(claim_leases("b", self.offsets, ttl=60), [])
+        self.assertEqual(claim_leases("a", self.offsets, ttl=60), [0, 1, 2, 3])
+        self.assertEqual(claim_leases("b", self.offsets, ttl=60), [4, 5, 6, 7])
+
+        # a dies: once its leases and heartbeat lapse, b takes everything
+        LeagueLease.objects.filter(owner="a").update(expires_at=timezone.now() - timedelta(seconds=1))
+        WorkerCheckpoint.objects.filter(name="a").update(updated_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(claim_leases("b", self.offsets, ttl=60), self.offsets)
+
+
+    def test_sharded_workers_on_the_default_name_hold_their_own_leases(self):
+        self.assertEqual(worker_identity(), "tracker")
+        self.assertEqual(worker_identity("edge"), "edge")
+        with mock.patch.dict("os.environ", {"FLY_MACHINE_ID": "e784079b"}):
+            self.assertEqual(worker_identity(shard=True), "e784079b")
+
+        # two machines started with the same command line and no fly machine id
+        with mock.patch.dict("os.environ", {}, clear=True), mock.patch("socket.gethostname", return_value="host"):
+            with mock.patch("os.getpid", return_value=101):
+                a = worker_identity(shard=True)
+            with mock.patch("os.getpid", return_value=202):
+                b = worker_identity(shard=True)
+        self.assertNotEqual(a, b)
+
+        claim_leases(a, self.offsets, ttl=60)
+        claim_leases(b, self.offsets, ttl=60)
+        held_a = claim_leases(a, self.offsets, ttl=60)
+        held_b = claim_leases(b, self.offsets, ttl=60)
+        self.assertEqual(sorted(held_a + held_b), self.offsets)
+        self.assertFalse(set(held_a) & set(held_b))
+        self.assertEqual(WorkerCheckpoint.objects.filter(name__in=[a, b]).count(), 2)
+
+
+@override_settings(TRACKER_CATEGORIES=[
+    {"key": "english"},
+    {"key": "spanish", "category_id": 2222, "base_league": "Virtual Football Spanish League", "offsets": [0, 1, 2]},
+])
+class CategoryTrackingTests(TestCase):
+    def test_categories_keep_their_own_seasons_and_checkpoints(self):
+        english, spanish = load_categories()
+        self.assertEqual(spanish.offsets, [0, 1, 2])
+        self.assertEqual([c.key for c in load_categories(["spanish"])], ["spanish"])
+
+        now = timezone.now()
+        Season.objects.create(season_id="100", active=True, started_at=now)
+        Season.objects.create(season_id="900", category="spanish", active=True, started_at=now)
+        command = Command(stdout=StringIO())
+        self.assertEqual(command.active_base_season("english").season_id, "100")
+        self.assertEqual(command.active_base_season("spanish").season_id, "900")
+
+        # a single-category checkpoint from before is read as the english category's
+        command.worker_name = "tracker"
+        command.checkpoint = {"season_id": "100", "last_season_id": "92", "feeds": {}}
+        command.checkpoint_lock = threading.Lock()
+        self.assertEqual(command.category_checkpoint("english")["season_id"], "100")
+        self.assertEqual(command.category_checkpoint("spanish"), {})
+
+        command.store_checkpoint("spanish", {"season_id": "900", "last_season_id": None, "feeds": {}})
+        command.store_checkpoint("english", {"season_id": "100", "last_season_id": "92", "feeds": {}})
+        saved = WorkerCheckpoint.load("tracker")
+        self.assertEqual(set(saved), {"english", "spanish"})
+        self.assertEqual(saved["spanish"]["season_id"], "900")
+
+    def test_stalled_category_does_not_hold_other_categories_fetches(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def fetch(sid, conditional=True):
+            if sid.startswith("stall"):
+                release.wait(5)
+            return [], {"name": sid}
+
+        fetcher = FeedFetcher(max_workers=4, per_group=2, log=lambda msg: None)
+        self.addCleanup(fetcher.close)
+        with mock.patch.object(fetcher, "fetch", side_effect=fetch):
+            stalled = fetcher.fetch_many(["stall1", "stall2", "stall3"], deadline=0.1, group="english")
+            self.assertEqual(stalled, {})
+            started = time.monotonic()
+            feeds = fetcher.fetch_many(["900", "901"], deadline=2, group="spanish")
+        self.assertEqual(sorted(feeds), ["900", "901"])
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(fetcher.executor("english")._max_workers, 2)
+
+    def test_browser_discovery_is_per_thread_and_clicks_the_callers_league(self):
+        from tracker.utils import playwright_helpers
+
+        self.addCleanup(playwright_helpers._shared_discovery.clear)
+        url = "https://example.test/category/1111"
+        shared = playwright_helpers.get_season_discovery(url, click_league_text="Virtual Football English League")
+        self.assertIs(playwright_helpers.get_season_discovery(url), shared)
+        other = []
+        thread = threading.Thread(target=lambda: other.append(playwright_helpers.get_season_discovery(url)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], shared)
+
+        page = mock.Mock()
+        page.wait_for_event.return_value = mock.Mock(url="https://feeds/stats_season_lastx/4321/13")
+        shared._context = mock.Mock(**{"new_page.return_value": page})
+        shared.log = lambda msg: None
+        season_id = shared.discover(timeout=1, click_league_text="Virtual Football Spanish League")
+        self.assertEqual(season_id, "4321")
+        page.click.assert_called_once_with("text=Virtual Football Spanish League", timeout=1000)
+
+    def test_rate_limiter_spaces_requests(self):
+        limiter = RateLimiter(50, burst=1)
+        started = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+
+class MetricsTests(TestCase):
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = Registry()
+        fetches = Histogram("fetch_seconds", "Fetch time.", ["league"], buckets=(0.1, 1), registry=registry)
+        errors = Counter("errors_total", "Errors.", registry=registry)
+        for value in (0.05, 0.5, 5):
+            fetches.observe(value, league="english:0")
+        errors.inc()
+
+        text = registry.render()
+        self.assertIn('fetch_seconds_bucket{league="english:0",le="0.1"} 1', text)
+        self.assertIn('fetch_seconds_bucket{league="english:0",le="1"} 2', text)
+        self.assertIn('fetch_seconds_bucket{league="english:0",le="+Inf"} 3', text)
+        self.assertIn('fetch_seconds_count{league="english:0"} 3', text)
+        self.assertIn("errors_total 1", text)
+
+    def test_endpoint_reports_page_cache_hits_and_view_latency(self):
+        cache.clear()
+        hits = CACHE_REQUESTS.get(kind="page", result="hit")
+        self.client.get(reverse("league-home"))
+        self.client.get(reverse("league-home"))
+        self.assertEqual(CACHE_REQUESTS.get(kind="page", result="hit"), hits + 1)
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('tracker_view_seconds_count{view="league-home"}', body)
+        self.assertIn('tracker_cache_requests_total{kind="page",result="miss"}', body)
+
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        self.command = Command(stdout=StringIO())
+        self.league = League.objects.create(name="Virtual Football League 3", external_id=3)
+
+    def test_rule_index_fires_only_on_crossings(self):
+        rules = [
+            Subscription(pk=1, kind=Subscription.REACHES, threshold=3, league_name="L"),
+            Subscription(pk=2, kind=Subscription.REACHES, threshold=5),
+            Subscription(pk=3, kind=Subscription.BREAKS, threshold=4, team_name="A"),
+            Subscription(pk=4, kind=Subscription.REACHES, threshold=3, league_name="Other"),
+        ]
+        index = RuleIndex(rules)
+        self.assertEqual(index.matches("L", "A", 2, 3), [1])
+        self.assertEqual(index.matches("L", "A", 3, 4), [])
+        self.assertEqual(sorted(index.matches("L", "B", 1, 6)), [1, 2])
+        self.assertEqual(index.matches("L", "A", 4, 0), [3])
+        self.assertEqual(index.matches("L", "A", 3, 0), [])
+        self.assertEqual(index.matches("L", "B", 4, 0), [])
+
+    def test_ingest_queues_each_crossing_once_and_delivers_in_batches(self):
+        Subscription.objects.create(kind=Subscription.REACHES, threshold=2, league_name=self.league.name,
+                                    channel="local", target="ops")
+        Subscription.objects.create(kind=Subscription.BREAKS, threshold=2, team_name="A",
+                                    channel="local", target="ops")
+        self.command.notifier.refresh()
+        matches = [
+            feed_match(1, 1, "A", "B", 2, 0),
+            feed_match(2, 2, "A", "B", 1, 0),  # both reach 2
+            feed_match(3, 3, "A", "B", 1, 1),  # both break
+        ]
+        self.command.process_matches_for_season(matches, "800", self.league)
+        self.command.process_matches_for_season(matches, "800", self.league)
+        self.assertEqual(Notification.objects.count(), 3)  # A and B reach 2, A breaks
+
+        local = LocalBackend()
+        self.assertEqual(deliver_pending(backends={"local": local}, log=lambda msg: None), 3)
+        self.assertEqual(len(local.sent), 1)
+        target, batch = local.sent[0]
+        self.assertEqual(target, "ops")
+        self.assertEqual(sorted((n["team"], n["new_streak"]) for n in batch), [("A", 0), ("A", 2), ("B", 2)])
+        self.assertEqual(deliver_pending(backends={"local": local}, log=lambda msg: None), 0)
+
+    def test_failed_delivery_stays_pending(self):
+        sub = Subscription.objects.create(threshold=1, channel="webhook", target="http://hook")
+        Notification.objects.create(subscription=sub, season_id="1", league_name="L", team_name="A",
+                                    match_id="1", old_streak=0, new_streak=1)
+
+        class Broken:
+            def send(self, target, notifications):
+                raise OSError("connection refused")
+
+        self.assertEqual(deliver_pending(backends={"webhook": Broken()}, log=lambda msg: None), 0)
+        pending = Notification.objects.get()
+        self.assertIsNone(pending.sent_at)
+        self.assertIsNone(pending.claimed_at)
+        self.assertEqual(pending.attempts, 1)
+
+    def test_delivery_is_scheduled_for_pending_rows_even_without_rules(self):
+        self.command.delivery_lock = threading.Lock()
+        self.command.delivery = None
+        courier = mock.Mock()
+        with mock.patch.object(Command, "courier", courier):
+            self.command.schedule_delivery()
+            courier.submit.assert_not_called()
+
+            # left behind by a failed send; every subscription has since been removed
+            sub = Subscription.objects.create(threshold=1, channel="local", target="ops")
+            Notification.objects.create(subscription=sub, season_id="1", league_name="L", team_name="A",
+                                        match_id="1", old_streak=0, new_streak=1, attempts=1)
+            Subscription.objects.filter(pk=sub.pk).update(active=False)
+            self.command.notifier.refresh()
+            self.assertFalse(self.command.notifier.index)
+            self.command.schedule_delivery()
+        courier.submit.assert_called_once_with(self.command.deliver_notifications)
+
+    def test_rows_are_claimed_before_sending_and_stale_claims_taken_over(self):
+        sub = Subscription.objects.create(threshold=1, channel="local", target="ops")
+        for match_id in ("1", "2", "3"):
+            Notification.objects.create(subscription=sub, season_id="1", league_name="L", team_name="A",
+                                        match_id=match_id, old_streak=0, new_streak=1)
+        # "2" is being sent by another worker; "3" by one that died long ago
+        Notification.objects.filter(match_id="2").update(claimed_at=timezone.now())
+        Notification.objects.filter(match_id="3").update(claimed_at=timezone.now() - CLAIM_TTL * 2)
+
+        claims = []
+
+        class Recording:
+            def send(self, target, notifications):
+                claims.extend(Notification.objects.filter(pk__in=[n.pk for n in notifications])
+                              .values_list("match_id", "claimed_at"))
+
+        self.assertEqual(deliver_pending(backends={"local": Recording()}, log=lambda msg: None), 2)
+        self.assertEqual(sorted(m for m, _ in claims), ["1", "3"])
+        self.assertTrue(all(claimed_at for _, claimed_at in claims))
+        self.assertEqual(
+            sorted(Notification.objects.filter(sent_at__isnull=False).values_list("match_id", flat=True)),
+            ["1", "3"],
+        )
+        self.assertFalse(Notification.objects.filter(match_id="1", claimed_at__isnull=False).exists())
+
+
+class StreakLogTests(TestCase):
+    def setUp(self):
+        self.command = Command(stdout=StringIO())
+        self.league = League.objects.create(name="Virtual Football League 2", external_id=2)
+        matches = [
+            feed_match(1, 1, "A", "B", 2, 0),
+            feed_match(2, 2, "A", "B", 1, 1),
+        ]
+        self.command.process_matches_for_season(matches, "900", self.league)
+
+    def test_ingest_appends_events_in_order(self):
+        events = list(StreakEvent.objects.order_by("seq").values_list(
+            "seq", "team_name", "result", "old_streak", "new_streak"
+        ))
+        self.assertEqual(events, [
+            (1, "A", "W", 0, 1), (2, "B", "L", 0, 1), (3, "A", "D", 1, 0), (4, "B", "D", 1, 0),
+        ])
+        # re-ingesting writes nothing new
+        self.command.process_matches_for_season([feed_match(2, 2, "A", "B", 1, 1)], "900", self.league)
+        self.assertEqual(StreakEvent.objects.count(), 4)
+
+    def test_api_tails_from_cursor(self):
+        url = reverse("api-streak-events")
+        first = self.client.get(url, {"after": 0, "limit": 3}).json()
+        self.assertEqual(first["seq"], [1, 2, 3])
+        self.assertEqual(first["cursor"], 3)
+        rest = self.client.get(url, {"after": first["cursor"]}).json()
+        self.assertEqual((rest["seq"], rest["cursor"], rest["expired"]), ([4], 4, False))
+        self.assertEqual(self.client.get(url, {"after": "x"}).status_code, 400)
+
+    def test_compaction_keeps_each_teams_last_event(self):
+        Season.objects.filter(season_id="900").update(active=False, ended_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(compact_streak_log(), (2, 0))
+        self.assertEqual(list(StreakEvent.objects.order_by("seq").values_list("seq", flat=True)), [3, 4])
+        self.assertTrue(self.client.get(reverse("api-streak-events"), {"after": 0}).json()["expired"])
+
+        later = timezone.now() + timedelta(days=30)
+        self.assertEqual(compact_streak_log(now=later), (0, 2))
+
+    def test_cursor_before_a_compacted_hole_is_expired(self):
+        # A's last event is seq 3; B's seq 4 is compacted away behind it
+        self.command.process_matches_for_season([feed_match(3, 3, "B", "C", 2, 0)], "900", self.league)
+        Season.objects.filter(season_id="900").update(active=False, ended_at=timezone.now() - timedelta(days=1))
+        compact_streak_log()
+        self.assertEqual(list(StreakEvent.objects.order_by("seq").values_list("seq", flat=True)), [3, 5, 6])
+
+        url = reverse("api-streak-events")
+        self.assertTrue(self.client.get(url, {"after": 3}).json()["expired"])
+        self.assertFalse(self.client.get(url, {"after": 4}).json()["expired"])
+
+    def test_rollover_starts_compaction_of_dropped_leagues(self):
+        self.command.roll_over(Category(offsets=[0, 1]), "1000")
+        season = Season.objects.get(season_id="900")
+        self.assertFalse(season.active)
+        self.assertIsNotNone(season.ended_at)
+        self.assertEqual(compact_streak_log(now=timezone.now() + timedelta(hours=7)), (2, 0))
+
+
+class SeasonArchiveTests(TestCase):
+    def test_inactive_season_moves_to_memory_mapped_columns(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        command = Command(stdout=StringIO())
+        league = League.objects.create(name="Virtual Football League 4", external_id=4)
+        matches = feed_rounds(["A", "B", "C", "D"], 3)
+        command.process_matches_for_season(matches, "950", league)
+        command.process_matches_for_season(feed_rounds(["E", "F"], 1, start_id=9000), "951", league)
+        # a live season's league whose teams have not played yet
+        pending_league = League.objects.create(name="Virtual Football League 5", external_id=952)
+        Season.objects.filter(season_id="950").update(active=False)
+        final = dict(Team.objects.filter(current_season__season_id="950").values_list("name", "streak"))
+
+        self.assertEqual(archive_pending(root=root, log=lambda msg: None, prune=True), 1)
+        self.assertFalse(Match.objects.filter(season__season_id="950").exists())
+        self.assertFalse(Team.objects.filter(current_season__season_id="950").exists())
+        self.assertTrue(Match.objects.filter(season__season_id="951").exists())
+        self.assertIsNotNone(Season.objects.get(season_id="950").archived_at)
+        self.assertEqual(archive_pending(root=root, log=lambda msg: None, prune=True), 0)
+        self.assertTrue(League.objects.filter(pk=pending_league.pk).exists())
+
+        # a late poll of the archived season, e.g. another shard's in-flight cycle, changes nothing
+        late = feed_rounds(["A", "B", "C", "D"], 4, start_id=1000)
+        self.assertEqual(command.process_matches_for_season(late, "950", league), 0)
+        season = Season.objects.get(season_id="950")
+        self.assertFalse(season.active)
+        self.assertFalse(Team.objects.filter(current_season=season).exists())
+
+        [season] = ArchiveReader(root)
+        self.assertEqual(season.season_id, "950")
+        columns = season.matches()
+        self.assertIsInstance(columns["match_id"], np.memmap)
+        self.assertEqual(columns["match_id"].tolist(), [m["_id"] for m in matches])
+        self.assertEqual(season.team_names(columns["home"][:2]), [m["teams"]["home"]["name"] for m in matches[:2]])
+        teams = season.teams()
+        streaks = dict(zip(season.team_names(teams["name"]), teams["streak"].tolist()))
+        self.assertEqual(streaks, final)
+
+
+    def test_live_rows_are_kept_unless_pruning_is_enabled(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        command = Command(stdout=StringIO())
+        league = League.objects.create(name="Virtual Football League 4", external_id=4)
+        command.process_matches_for_season(feed_rounds(["A", "B", "C", "D"], 3), "955", league)
+        Season.objects.filter(season_id="955").update(active=False)
+
+        with override_settings(TRACKER_ARCHIVE_PRUNE=False):
+            self.assertEqual(archive_pending(root=root, log=lambda msg: None), 1)
+        self.assertIsNotNone(Season.objects.get(season_id="955").archived_at)
+        self.assertEqual(Match.objects.filter(season__season_id="955").count(), 6)
+        self.assertEqual(Team.objects.filter(current_season__season_id="955").count(), 4)
+        self.assertEqual([s.season_id for s in ArchiveReader(root)], ["955"])
+
+
+class StreakAnalyticsTests(TestCase):
+    def test_archived_seasons_feed_vectorized_streak_stats(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        command = Command(stdout=StringIO())
+        expected_played = np.zeros(MAX_STREAK + 1, dtype=int)
+        expected_draws = np.zeros(MAX_STREAK + 1, dtype=int)
+        for sid in ("960", "961"):
+            doc = synthetic_season(sid, "League X", teams=6, rounds=12, seed=3)
+            matches, season_data = command.fetcher.parse(sid, json.dumps(doc).encode())
+            league = command.get_or_create_league(season_data)
+            command.process_matches_for_season(matches, sid, league)
+
+            # the same numbers by walking every team's results one by one
+            streak = {}
+            for m in sorted(matches, key=lambda m: (m["round"], m["_id"])):
+                drawn = m["result"]["home"] == m["result"]["away"]
+                for side in ("home", "away"):
+                    name = m["teams"][side]["name"]
+                    n = min(streak.get(name, 0), MAX_STREAK)
+                    expected_played[n] += 1
+                    expected_draws[n] += drawn
+                    streak[name] = 0 if drawn else streak.get(name, 0) + 1
+        Season.objects.update(active=False)
+        archive_pending(root=root, log=lambda msg: None)
+
+        response = self.client.get(reverse("api-streak-stats"), {"category": "english"})
+        report = response.json()["leagues"][season_data["name"]]
+        self.assertEqual(report["seasons"], 2)
+        self.assertEqual(report["played"], expected_played.tolist())
+        n = int(np.argmax(expected_played))
+        self.assertAlmostEqual(report["p_draw"][n], expected_draws[n] / expected_played[n], places=4)
+        self.assertEqual(self.client.get(reverse("api-streak-stats"), {"category": "other"}).json()["leagues"], {})
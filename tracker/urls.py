@@ -4,4 +4,5 @@ from . import views
 urlpatterns = [
     path("leagues/", views.league_list, name="league-home"),
     path("leagues/<int:league_id>/", views.league_detail, name="league-detail"),
+    path("leagues/<int:league_id>/stream/", views.league_stream, name="league-stream"),
 ]
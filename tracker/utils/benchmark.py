@@ -0,0 +1,88 @@
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tracker.utils.feeds import parse_feed
+from tracker.utils.synthetic import synthetic_leagues
+
+
+def ingest_documents(command, documents):
+    """Ingest each document like one tracker cycle; returns per-call (matches, seconds, queries)."""
+    calls = []
+    for sid, document in documents.items():
+        matches, season_data = parse_feed(document)
+        league = command.get_or_create_league(season_data)
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            created = command.process_matches_for_season(matches, sid, league)
+            elapsed = time.perf_counter() - started
+        calls.append((created, elapsed, len(ctx.captured_queries)))
+    return calls
+
+
+def summarize(name, calls, wall, peak_bytes):
+    matches = sum(c[0] for c in calls)
+    queries = sum(c[2] for c in calls)
+    txn_times = [c[1] for c in calls]
+    return {
+        "scenario": name,
+        "matches": matches,
+        "seconds": round(wall, 4),
+        "matches_per_sec": round(matches / wall, 1) if wall else None,
+        "queries": queries,
+        "queries_per_match": round(queries / matches, 3) if matches else None,
+        "transactions": len(calls),
+        "txn_ms_mean": round(1000 * sum(txn_times) / len(txn_times), 3) if txn_times else None,
+        "txn_ms_max": round(1000 * max(txn_times), 3) if txn_times else None,
+        "peak_memory_kb": peak_bytes // 1024,
+    }
+
+
+def run_steps(command, steps):
+    started = time.perf_counter()
+    calls = []
+    for documents in steps:
+        calls.extend(ingest_documents(command, documents))
+    return calls, time.perf_counter() - started
+
+
+def peak_memory(command, steps):
+    """Peak Python allocations while ingesting `steps`, measured apart from timing as tracemalloc is slow."""
+    tracemalloc.start()
+    try:
+        run_steps(command, steps)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def scenario_steps(name, base_id, leagues, teams, rounds, seed):
+    if name == "full_season":
+        return [synthetic_leagues(base_id, leagues, teams, rounds, seed=seed)]
+    return [
+        synthetic_leagues(base_id, leagues, teams, rounds, settled_rounds=r, seed=seed)
+        for r in range(1, rounds + 1)
+    ]
+
+
+def run_ingest_benchmark(command, leagues=8, teams=20, rounds=30, seed=0, base_id=100000):
+    """
+    Benchmark the tracker's ingest path on synthetic seasons.
+
+    "full_season" ingests every league's finished season in one call each,
+    like a worker catching up after downtime. "round_by_round" replays the
+    feed as the live worker sees it, one more settled round per cycle.
+    Each scenario runs twice on fresh season IDs: once timed, once traced
+    for memory.
+    """
+    results = []
+    for name in ("full_season", "round_by_round"):
+        timed = scenario_steps(name, base_id, leagues, teams, rounds, seed)
+        traced = scenario_steps(name, base_id + leagues, leagues, teams, rounds, seed)
+        base_id += 2 * leagues
+
+        calls, wall = run_steps(command, timed)
+        results.append(summarize(name, calls, wall, peak_memory(command, traced)))
+    return results
@@ -0,0 +1,49 @@
+import re
+
+from django.conf import settings
+
+from tracker.models import DEFAULT_CATEGORY
+
+CATEGORY_PAGE_FMT = "https://st-cdn001.akamaized.net/bet9javirtuals/en/1/category/{category_id}"
+
+# the original English-league set, tracked when TRACKER_CATEGORIES is not configured
+BASE_LEAGUE_NAME = "Virtual Football English League"
+RELEVANT_OFFSETS = [0, 1, 2, 3, 4, 5, 6, 7]
+
+
+def league_base_name(name):
+    """
+    A feed's league name without its trailing season number, e.g. "Virtual
+    Football English League 2" for "Virtual Football English League 2 2150".
+    """
+    return re.sub(r"\s+\d+$", "", (name or "").strip())
+
+
+class Category:
+    """
+    One virtual competition set: a category page, the league whose feed
+    identifies its base season, and the season offsets tracked from that base.
+    """
+
+    def __init__(self, key=DEFAULT_CATEGORY, category_id=1111, base_league=BASE_LEAGUE_NAME,
+                 offsets=RELEVANT_OFFSETS):
+        self.key = key
+        self.category_id = category_id
+        self.base_league = base_league
+        self.offsets = list(offsets)
+
+    def __repr__(self):
+        return f"Category({self.key!r}, {self.category_id})"
+
+    @property
+    def page_url(self):
+        return CATEGORY_PAGE_FMT.format(category_id=self.category_id)
+
+
+def load_categories(keys=None):
+    """Categories from settings.TRACKER_CATEGORIES, optionally limited to `keys`."""
+    configured = getattr(settings, "TRACKER_CATEGORIES", None) or [{}]
+    categories = [Category(**conf) for conf in configured]
+    if keys:
+        categories = [c for c in categories if c.key in keys]
+    return categories
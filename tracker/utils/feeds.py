@@ -0,0 +1,210 @@
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tracker.metrics import FEED_ERRORS
+
+
+API_FEED_BASE = "https://vgls-vs001.akamaized.net/vfl/feeds/?/bet9javirtuals/en/Africa:Lagos/gismo"
+FEED_PATH_FMT = "/stats_season_lastx/{season_id}/13"
+API_FEED_FMT = API_FEED_BASE + FEED_PATH_FMT
+
+
+def feed_url_fmt(base_url=None):
+    """Feed URL template for `base_url` (e.g. a local replay server), defaulting to the live host."""
+    return (base_url or API_FEED_BASE).rstrip("/") + FEED_PATH_FMT
+
+
+def build_session(pool_size=8):
+    """Keep-alive session whose connection pool fits one request per league."""
+    session = requests.Session()
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def parse_feed(data):
+    """Pull (matches, season_data) out of a stats_season_lastx document."""
+    doc = data.get("doc", [None])[0]
+    if not doc:
+        return None, None
+    season_data = doc.get("data", {}).get("season") or doc.get("data", {})
+    matches = doc.get("data", {}).get("matches", [])
+    return matches, season_data
+
+
+def is_settled(match):
+    res = match.get("result") or {}
+    return res.get("home") is not None and res.get("away") is not None
+
+
+def round_progress(matches, start=0):
+    """
+    Single pass over a feed: (highest fully settled round, highest round seen).
+
+    Rounds up to `start` are taken as already settled and skipped, so a
+    season's watermark can be passed in to look only at newer rounds.
+    """
+    rounds = {}
+    for m in matches:
+        r = m.get("round", 0) or 0
+        if r > start:
+            rounds[r] = rounds.get(r, True) and is_settled(m)
+    highest = start
+    for r in sorted(rounds):
+        if not rounds[r]:
+            break
+        highest = r
+    return highest, max(rounds, default=start)
+
+
+def settled_round(matches):
+    """Highest round such that it and every round before it are fully settled (0 if none)."""
+    return round_progress(matches)[0]
+
+
+class RateLimiter:
+    """Token bucket shared by every fetch thread: at most `rate` requests per second on average."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class FeedFetcher:
+    """
+    Fetches stats_season_lastx feeds over one pooled session.
+
+    fetch_many() pulls several seasons at once so a cycle costs roughly the
+    slowest single feed rather than the sum of all of them.
+
+    Fetches run on one thread pool per `group` (a category), each holding
+    `per_group` of the `max_workers` slots, under a shared session and rate
+    limit. A category that probes 32 seasons or whose writer falls behind
+    only ever ties up its own threads.
+
+    Each season remembers the ETag / Last-Modified and a digest of the last
+    payload that was ingested. A 304, or a body identical to that payload,
+    comes back as (None, None) so the caller skips parsing and DB work.
+    Callers confirm a payload with commit() once it has been stored.
+    """
+
+    def __init__(self, max_workers=8, timeout=10, log=print, base_url=None, rate_limit=None, per_group=None):
+        self.url_fmt = feed_url_fmt(base_url)
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.timeout = timeout
+        self.log = log
+        self.seen = {}      # season_id -> {"etag", "last_modified", "digest"} of the last ingested payload
+        self.pending = {}   # season_id -> same, for a payload fetched but not yet committed
+        self.session = build_session(pool_size=max_workers)
+        self.per_group = min(per_group or max_workers, max_workers)
+        self.executors = {}
+        self.executors_lock = threading.Lock()
+
+    def executor(self, group=None):
+        """The thread pool `group`'s fetches run on, created on first use."""
+        with self.executors_lock:
+            if group not in self.executors:
+                self.executors[group] = ThreadPoolExecutor(
+                    max_workers=self.per_group, thread_name_prefix=f"feed-{group}" if group else "feed"
+                )
+            return self.executors[group]
+
+    def fetch_raw(self, season_id, conditional=True):
+        """Response body for `season_id`, or None on errors, 304s and unchanged payloads."""
+        url = self.url_fmt.format(season_id=season_id)
+        seen = self.seen.get(season_id, {}) if conditional else {}
+        headers = {}
+        if seen.get("etag"):
+            headers["If-None-Match"] = seen["etag"]
+        if seen.get("last_modified"):
+            headers["If-Modified-Since"] = seen["last_modified"]
+
+        if self.limiter:
+            self.limiter.acquire()
+        try:
+            r = self.session.get(url, headers=headers, timeout=self.timeout)
+            if r.status_code == 304:
+                return None
+            r.raise_for_status()
+            digest = hashlib.sha1(r.content).hexdigest()
+            if digest == seen.get("digest"):
+                return None
+        except Exception as e:
+            FEED_ERRORS.inc()
+            self.log(f"API error {season_id}: {e}")
+            return None
+
+        self.pending[season_id] = {
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "digest": digest,
+        }
+        return r.content
+
+    def parse(self, season_id, body):
+        """(matches, season_data) from a body returned by fetch_raw()."""
+        if body is None:
+            return None, None
+        try:
+            return parse_feed(json.loads(body))
+        except Exception as e:
+            self.log(f"Parse error {season_id}: {e}")
+            return None, None
+
+    def fetch(self, season_id, conditional=True):
+        return self.parse(season_id, self.fetch_raw(season_id, conditional))
+
+    def fetch_many(self, season_ids, deadline=None, conditional=True, group=None):
+        """
+        Fetch every season concurrently on `group`'s pool and return
+        {season_id: (matches, season_data)}.
+
+        Feeds still in flight when `deadline` seconds have passed are left out
+        of the result; they are picked up again on the next cycle.
+        """
+        started = time.monotonic()
+        executor = self.executor(group)
+        futures = {executor.submit(self.fetch, sid, conditional): sid for sid in season_ids}
+        done, pending = wait(futures, timeout=deadline)
+
+        results = {}
+        for future in done:
+            results[futures[future]] = future.result()
+        if pending:
+            late = sorted(futures[f] for f in pending)
+            self.log(f"⏱️ Cycle deadline hit after {time.monotonic() - started:.1f}s, skipping {late}")
+        return results
+
+    def commit(self, season_id):
+        """Mark the last payload fetched for `season_id` as ingested."""
+        if season_id in self.pending:
+            self.seen[season_id] = self.pending.pop(season_id)
+
+    def close(self):
+        with self.executors_lock:
+            for executor in self.executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
@@ -0,0 +1,80 @@
+import math
+import os
+import socket
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from tracker.models import DEFAULT_CATEGORY, LeagueLease, WorkerCheckpoint
+
+
+# checkpoint name of an unsharded worker
+DEFAULT_WORKER_NAME = "tracker"
+
+
+def worker_identity(name=None, shard=False):
+    """
+    The name a worker heartbeats, checkpoints and holds leases under.
+
+    Leases are owned by name, so sharded workers left on the default must
+    not share one: they get the fly machine id, which survives restarts,
+    or else host and pid.
+    """
+    if name:
+        return name
+    if not shard:
+        return DEFAULT_WORKER_NAME
+    return os.environ.get("FLY_MACHINE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+def ensure_leases(offsets, category=DEFAULT_CATEGORY):
+    LeagueLease.objects.bulk_create(
+        [LeagueLease(category=category, offset=o) for o in offsets], ignore_conflicts=True
+    )
+
+
+def live_worker_count(ttl):
+    since = timezone.now() - timedelta(seconds=ttl)
+    return WorkerCheckpoint.objects.filter(updated_at__gte=since).count()
+
+
+def claim_leases(worker, offsets, ttl, category=DEFAULT_CATEGORY):
+    """
+    Renew this worker's leases and claim expired ones, up to a fair share.
+
+    The share is the offsets divided by the workers that heartbeated within
+    `ttl`, so a new worker gets room as soon as the others drop their
+    surplus, and a dead worker's leases are taken over once they expire.
+    Rows locked by another worker's claim are skipped, not waited on.
+    Returns the offsets this worker now holds.
+    """
+    WorkerCheckpoint.heartbeat(worker)
+    share = math.ceil(len(offsets) / max(live_worker_count(ttl), 1))
+    now = timezone.now()
+
+    with transaction.atomic():
+        candidates = list(
+            LeagueLease.objects.select_for_update(skip_locked=True)
+            .filter(category=category, offset__in=offsets)
+            .filter(Q(owner=worker) | Q(owner="") | Q(expires_at__isnull=True) | Q(expires_at__lt=now))
+            .order_by("offset")
+        )
+        held = [lease.pk for lease in candidates if lease.owner == worker]
+        free = [lease.pk for lease in candidates if lease.owner != worker]
+        keep = held[:share] + free[:max(share - len(held), 0)]
+
+        LeagueLease.objects.filter(pk__in=keep).update(
+            owner=worker, expires_at=now + timedelta(seconds=ttl)
+        )
+        LeagueLease.objects.filter(pk__in=held[share:]).update(owner="", expires_at=None)
+
+    return sorted(lease.offset for lease in candidates if lease.pk in keep)
+
+
+def release_leases(worker, category=None):
+    leases = LeagueLease.objects.filter(owner=worker)
+    if category is not None:
+        leases = leases.filter(category=category)
+    leases.update(owner="", expires_at=None)
@@ -0,0 +1,185 @@
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connection, transaction
+
+from tracker.metrics import (
+    CYCLE_QUERIES, CYCLE_ROWS, FEED_FETCH_SECONDS, FEED_FETCHES, INGEST_LAG_SECONDS, ROWS_WRITTEN,
+)
+from tracker.utils.tracing import NULL_CYCLE
+
+# marks a feed that produced nothing to parse or write (error, 304, unchanged, late)
+SKIPPED = object()
+
+
+class StageTimer:
+    """Accumulated busy time and item counts per pipeline stage."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seconds = defaultdict(float)
+        self.items = defaultdict(int)
+
+    def add(self, stage, seconds, items=1):
+        with self.lock:
+            self.seconds[stage] += seconds
+            self.items[stage] += items
+
+    def summary(self):
+        return {stage: {"seconds": round(self.seconds[stage], 4), "items": self.items[stage]}
+                for stage in self.seconds}
+
+
+class IngestPipeline:
+    """
+    One tracker cycle as fetch -> parse -> persist stages.
+
+    The fetcher's thread pool for this pipeline's group downloads feeds into
+    a queue, a parser thread decodes them into a second queue, and the
+    calling thread is the single DB writer. Backpressure is applied where
+    fetches are submitted: at most 2 * `queue_size` feeds may be between
+    download and write, so a slow commit holds back new downloads instead of
+    piling up payloads, and pool threads never block on a full queue. The
+    writer drains whatever is ready and commits up to `batch_size` leagues
+    in one transaction; each league still gets its own savepoint, so one bad
+    feed does not roll back the others.
+
+    `persist(season_id, matches, season_data)` does the DB work for a
+    league and returns its number of new matches. `name` labels the
+    per-cycle metrics and picks the fetcher's thread pool.
+    """
+
+    def __init__(self, fetcher, persist, queue_size=4, batch_size=8, log=print, name="tracker"):
+        self.fetcher = fetcher
+        self.persist = persist
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.log = log
+        self.name = name
+        self.polled = {}  # season_id -> when its previous fetch started
+
+    def run(self, season_ids, deadline=None, labels=None, trace=NULL_CYCLE):
+        """
+        Run one cycle and return (feeds, new_counts, timings), where timings maps
+        each stage to its busy seconds and item count (feeds fetched / parsed,
+        transactions committed).
+
+        feeds maps every season that produced a payload to (matches, season_data);
+        anything still in flight when `deadline` seconds pass is left for the next cycle.
+        `labels` names each season's league in metrics (default: the season id);
+        `trace` collects a span per fetch, parse, persist and committed batch.
+        """
+        labels = labels or {}
+        timer = StageTimer()
+        started = time.monotonic()
+        previous_poll = {sid: self.polled[sid] for sid in season_ids if sid in self.polled}
+        self.polled = dict(previous_poll)
+        ends_at = started + deadline if deadline else None
+        raw_q = queue.Queue()
+        parsed_q = queue.Queue()
+        # taken before a fetch is submitted, given back when the writer receives it
+        window = threading.BoundedSemaphore(2 * self.queue_size)
+
+        def remaining():
+            return None if ends_at is None else max(0.0, ends_at - time.monotonic())
+
+        def fetch(sid):
+            t0 = time.monotonic()
+            self.polled[sid] = t0
+            body = None
+            league = labels.get(sid, sid)
+            try:
+                with trace.span("fetch", league=league):
+                    body = self.fetcher.fetch_raw(sid)
+            finally:
+                elapsed = time.monotonic() - t0
+                timer.add("fetch", elapsed)
+                FEED_FETCH_SECONDS.observe(elapsed, league=league)
+                FEED_FETCHES.inc(league=league, outcome="unchanged" if body is None else "changed")
+                raw_q.put((sid, SKIPPED if body is None else body))
+
+        def parse():
+            for _ in season_ids:
+                try:
+                    sid, body = raw_q.get(timeout=remaining())
+                except queue.Empty:
+                    return
+                if body is not SKIPPED:
+                    t0 = time.monotonic()
+                    with trace.span("parse", league=labels.get(sid, sid)):
+                        body = self.fetcher.parse(sid, body)
+                    timer.add("parse", time.monotonic() - t0)
+                    if body == (None, None):
+                        body = SKIPPED
+                parsed_q.put((sid, body))
+
+        def submit():
+            executor = self.fetcher.executor(self.name)
+            for sid in season_ids:
+                if not window.acquire(timeout=remaining()):
+                    return  # past the deadline; the rest wait for the next cycle
+                executor.submit(fetch, sid)
+
+        threading.Thread(target=submit, name="feed-submitter", daemon=True).start()
+        threading.Thread(target=parse, name="feed-parser", daemon=True).start()
+
+        feeds, new_counts = {}, {}
+        received = set()
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            while len(received) < len(season_ids):
+                try:
+                    batch = [parsed_q.get(timeout=remaining())]
+                except queue.Empty:
+                    late = sorted(set(season_ids) - received)
+                    self.log(f"⏱️ Cycle deadline hit after {time.monotonic() - started:.1f}s, skipping {late}")
+                    break
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(parsed_q.get_nowait())
+                    except queue.Empty:
+                        break
+                received.update(sid for sid, _ in batch)
+                for _ in batch:
+                    window.release()
+
+                ready = [(sid, parsed) for sid, parsed in batch if parsed is not SKIPPED]
+                if ready:
+                    t0 = time.monotonic()
+                    with trace.span("write", leagues=len(ready)):
+                        self.write_batch(ready, feeds, new_counts, trace, labels)
+                    committed = time.monotonic()
+                    # one "write" item per committed batch
+                    timer.add("write", committed - t0)
+                    for sid, _ in ready:
+                        if new_counts.get(sid) and sid in previous_poll:
+                            INGEST_LAG_SECONDS.observe(committed - previous_poll[sid], league=labels.get(sid, sid))
+
+        rows = sum(new_counts.values())
+        CYCLE_QUERIES.observe(queries[0], category=self.name)
+        CYCLE_ROWS.observe(rows, category=self.name)
+        ROWS_WRITTEN.inc(rows, category=self.name)
+        return feeds, new_counts, timer.summary()
+
+    def write_batch(self, batch, feeds, new_counts, trace=NULL_CYCLE, labels=None):
+        written = []
+        with transaction.atomic():
+            for sid, (matches, season_data) in batch:
+                feeds[sid] = (matches, season_data)
+                try:
+                    with trace.span("persist", league=(labels or {}).get(sid, sid)), transaction.atomic():
+                        new_counts[sid] = self.persist(sid, matches, season_data)
+                except Exception as e:
+                    self.log(f"DB error {sid}: {e}")
+                    continue
+                written.append(sid)
+        # validators only move once the batch is durable
+        for sid in written:
+            self.fetcher.commit(sid)
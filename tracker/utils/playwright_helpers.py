@@ -1,79 +1,171 @@
 import re
+import threading
 import time
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
 
+BASE_URL = "https://st-cdn001.akamaized.net/bet9javirtuals/en/1/category/1111"
+SEASON_URL_RE = re.compile(r"stats_season_lastx/(\d+)/")
+
+# resource types the season request never depends on
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-extensions",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--window-size=1,1",
+    "--disable-blink-features=AutomationControlled",
+]
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/118 Safari/537.36"
+)
+
+
+def _is_season_request(req):
+    return "stats_season_lastx" in req.url
+
+
+class SeasonDiscovery:
+    """
+    Warm Chromium context that captures the season ID from the virtuals page.
+
+    The browser is launched on first use and kept between rollovers. Images,
+    fonts and media are aborted, and discover() returns as soon as the first
+    stats_season_lastx request goes out instead of listening for a fixed time.
+    """
+
+    def __init__(self, base_url=BASE_URL, headless=True,
+                 click_league_text="Virtual Football English League", log=print):
+        self.base_url = base_url
+        self.headless = headless
+        self.click_league_text = click_league_text
+        self.log = log
+        self._playwright = None
+        self._browser = None
+        self._context = None
+
+    def start(self):
+        if self._context is not None:
+            return
+        self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.headless, args=BROWSER_ARGS)
+        self._context = self._browser.new_context(user_agent=USER_AGENT)
+        self._context.route("**/*", self._block_heavy_resources)
+
+    def _block_heavy_resources(self, route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            route.abort()
+        else:
+            route.continue_()
+
+    def discover(self, timeout=20, click_league_text=None):
+        """
+        Return the captured season ID, or None if none was seen within
+        `timeout` seconds. `click_league_text` overrides the league link
+        clicked when the page alone does not request a season.
+        """
+        click_league_text = click_league_text or self.click_league_text
+        self.start()
+        timeout_ms = timeout * 1000
+        captured = []
+        page = self._context.new_page()
+        page.on("request", lambda req: captured.append(req.url) if _is_season_request(req) else None)
+
+        try:
+            page.goto(self.base_url, wait_until="domcontentloaded", timeout=timeout_ms)
+            if not captured:
+                try:
+                    self.log(f"🔍 Clicking league link: {click_league_text}")
+                    page.click(f"text={click_league_text}", timeout=timeout_ms)
+                except PWTimeoutError:
+                    self.log("⚠️ Could not find league link — continuing anyway.")
+            if not captured:
+                try:
+                    req = page.wait_for_event("request", predicate=_is_season_request, timeout=timeout_ms)
+                    captured.append(req.url)
+                except PWTimeoutError:
+                    pass
+        finally:
+            page.close()
+
+        for url in captured:
+            match = SEASON_URL_RE.search(url)
+            if match:
+                return match.group(1)
+        return None
+
+    def close(self):
+        for closer in (self._context, self._browser):
+            try:
+                if closer is not None:
+                    closer.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            self._playwright.stop()
+        self._playwright = self._browser = self._context = None
+
+
+_shared_discovery = {}
+
+
+def get_season_discovery(base_url=BASE_URL, headless=True, **kwargs):
+    """
+    Shared SeasonDiscovery per category page, browser mode and thread, so
+    repeated discoveries reuse one warm browser. Playwright's sync API is
+    bound to the thread that started it, so category threads never share an
+    instance. The league to click is passed to discover() on each call;
+    other keyword arguments only apply when the instance is first created.
+    """
+    key = (base_url, headless, threading.get_ident())
+    if key not in _shared_discovery:
+        _shared_discovery[key] = SeasonDiscovery(base_url=base_url, headless=headless, **kwargs)
+    return _shared_discovery[key]
+
+
 def discover_season_id_via_playwright(
-    base_url="https://st-cdn001.akamaized.net/bet9javirtuals/en/1/category/1111",
+    base_url=BASE_URL,
     headless=True,
     listen_seconds=10,
     max_retries=3,
     click_league_text="Virtual Football English League",
+    log=print,
 ):
     """
-    Fetch season_id from Bet9ja Virtuals using Playwright (headless-safe version).
+    Fetch season_id from Bet9ja Virtuals using the shared warm browser.
     Works locally and in production (e.g. PythonAnywhere, Docker).
     """
+    discovery = get_season_discovery(
+        base_url=base_url, headless=headless, click_league_text=click_league_text, log=log
+    )
 
     for attempt in range(1, max_retries + 1):
-        print(f"🎭 Discovering new season ID (attempt {attempt}/{max_retries})...")
+        log(f"🎭 Discovering new season ID (attempt {attempt}/{max_retries})...")
 
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(
-                    headless=headless,
-                    args=[
-                        "--no-sandbox",
-                        "--disable-setuid-sandbox",
-                        "--disable-gpu",
-                        "--disable-dev-shm-usage",
-                        "--single-process",
-                        "--disable-accelerated-2d-canvas",
-                    ],
-                )
-
-                page = browser.new_page()
-                captured = []
-
-                def on_request(req):
-                    url = req.url
-                    if "stats_season_lastx" in url or "stats_season" in url:
-                        captured.append(url)
-                        print("📡 Captured:", url)
-
-                page.on("request", on_request)
-
-                print("🌍 Navigating to base page...")
-                page.goto(base_url, wait_until="networkidle", timeout=60000)
-
-                # Use Playwright's text selector (this works even for dynamic DOM)
-                try:
-                    print(f"🔍 Waiting for league link: {click_league_text}")
-                    page.wait_for_selector(f"text={click_league_text}", timeout=20000)
-                    print("✅ Clicking league link...")
-                    page.click(f"text={click_league_text}")
-                except PWTimeoutError:
-                    print("⚠️ Could not find league link — continuing anyway.")
-
-                print(f"🎧 Listening for {listen_seconds}s of network requests...")
-                page.wait_for_timeout(listen_seconds * 1000)
-
-                browser.close()
-
-                for url in captured:
-                    match = re.search(r"stats_season_lastx/(\d+)/", url) or re.search(r"stats_season/(\d+)", url)
-                    if match:
-                        season_id = match.group(1)
-                        print("🎯 Found season ID:", season_id)
-                        return season_id
-
-                print(f"❌ No valid season ID captured in attempt {attempt}/{max_retries}")
-
+            season_id = discovery.discover(timeout=listen_seconds, click_league_text=click_league_text)
+            if season_id:
+                log(f"🎯 Found season ID: {season_id}")
+                return season_id
+            log(f"❌ No valid season ID captured in attempt {attempt}/{max_retries}")
         except Exception as e:
-            print(f"⚠️ Playwright attempt {attempt} failed:", repr(e))
+            log(f"⚠️ Playwright attempt {attempt} failed: {e!r}")
+            # a crashed browser is relaunched on the next attempt
+            discovery.close()
 
-        time.sleep(3)
+        if attempt < max_retries:
+            time.sleep(3)
 
-    print("🚫 Failed to capture season ID after all retries.")
+    log("🚫 Failed to capture season ID after all retries.")
     return None
 
 
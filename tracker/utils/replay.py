@@ -0,0 +1,143 @@
+import copy
+import hashlib
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from tracker.utils.feeds import build_session, feed_url_fmt
+
+FEED_PATH_RE = re.compile(r"/stats_season_lastx/(\d+)/")
+
+
+def record_snapshot(session, url_fmt, out_dir, season_id, last_digest=None, timeout=10):
+    """
+    Save the current payload of `season_id` under out_dir/<season_id>/ if it differs
+    from `last_digest`. Returns the payload's digest.
+    """
+    r = session.get(url_fmt.format(season_id=season_id), timeout=timeout)
+    r.raise_for_status()
+    digest = hashlib.sha1(r.content).hexdigest()
+    if digest != last_digest:
+        season_dir = Path(out_dir) / str(season_id)
+        season_dir.mkdir(parents=True, exist_ok=True)
+        n = len(list(season_dir.glob("*.json")))
+        (season_dir / f"{n:04d}-{int(time.time())}.json").write_bytes(r.content)
+    return digest
+
+
+def record_feeds(out_dir, season_ids, base_url=None, interval=10, duration=None, log=print):
+    """Poll the live feeds and keep every distinct payload on disk until `duration` seconds pass."""
+    session = build_session(pool_size=len(season_ids))
+    url_fmt = feed_url_fmt(base_url)
+    digests = {}
+    started = time.monotonic()
+
+    while duration is None or time.monotonic() - started < duration:
+        for sid in season_ids:
+            try:
+                digest = record_snapshot(session, url_fmt, out_dir, sid, digests.get(sid))
+            except Exception as e:
+                log(f"API error {sid}: {e}")
+                continue
+            if digest != digests.get(sid):
+                log(f"💾 Recorded new payload for {sid}")
+                digests[sid] = digest
+        time.sleep(interval)
+
+
+def load_recording(recording_dir):
+    """{season_id: payload} using the latest snapshot recorded for each season."""
+    seasons = {}
+    for season_dir in sorted(Path(recording_dir).iterdir()):
+        snapshots = sorted(season_dir.glob("*.json")) if season_dir.is_dir() else []
+        if snapshots:
+            seasons[season_dir.name] = json.loads(snapshots[-1].read_bytes())
+    return seasons
+
+
+def max_round(payload):
+    matches = payload["doc"][0]["data"].get("matches", [])
+    return max((m.get("round", 0) or 0 for m in matches), default=0)
+
+
+class ReplayFeed:
+    """
+    Replays recorded seasons round by round on a virtual clock.
+
+    Seasons are grouped into generations of `season_span` consecutive IDs
+    (one base season plus its leagues). A generation reveals one more
+    settled round every `round_seconds / speed` wall seconds, and the next
+    generation only appears once the previous one has fully played out, so
+    rollover can be exercised in minutes.
+    """
+
+    def __init__(self, seasons, round_seconds=180, speed=1.0, season_span=8, clock=time.monotonic):
+        self.seasons = seasons
+        self.round_seconds = round_seconds
+        self.speed = speed
+        self.clock = clock
+        self.started = clock()
+
+        self.windows = {}  # season_id -> (virtual start second, rounds in its generation)
+        start = 0
+        ids = sorted(seasons, key=int)
+        for i in range(0, len(ids), season_span):
+            generation = ids[i:i + season_span]
+            rounds = max(max_round(seasons[sid]) for sid in generation)
+            for sid in generation:
+                self.windows[sid] = (start, rounds)
+            start += rounds * round_seconds
+
+    def revealed_round(self, season_id, now=None):
+        """Rounds settled so far for `season_id`, or None if its generation has not started."""
+        elapsed = ((now if now is not None else self.clock()) - self.started) * self.speed
+        start, rounds = self.windows[season_id]
+        if elapsed < start:
+            return None
+        return min(rounds, int((elapsed - start) // self.round_seconds))
+
+    def payload(self, season_id):
+        if season_id not in self.seasons:
+            return None
+        revealed = self.revealed_round(season_id)
+        if revealed is None:
+            return None
+        payload = copy.deepcopy(self.seasons[season_id])
+        for m in payload["doc"][0]["data"].get("matches", []):
+            if (m.get("round", 0) or 0) > revealed:
+                m["result"] = {"home": None, "away": None}
+        return payload
+
+
+def make_replay_server(feed, host="127.0.0.1", port=8800):
+    """HTTP server answering /stats_season_lastx/<id>/13 from `feed`, with ETag revalidation."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            match = FEED_PATH_RE.search(self.path)
+            payload = feed.payload(match.group(1)) if match else None
+            if payload is None:
+                self.send_error(404)
+                return
+
+            body = json.dumps(payload, separators=(",", ":")).encode()
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
@@ -0,0 +1,110 @@
+import time
+
+from tracker.metrics import SETTLE_ERROR_SECONDS, SETTLE_LAST_ERROR
+from tracker.utils.feeds import settled_round
+
+
+class PollScheduler:
+    """
+    Decides how long the tracker sleeps between polls.
+
+    Every fetched feed reports its highest settled round. When that round
+    moves, the gap since the previous settle feeds a per-season moving
+    average of the round cadence. Polls are then spaced out until shortly
+    before the next expected settle and run at `min_interval` around it.
+
+    `last_error` / `mean_abs_error` hold how far (in seconds) the observed
+    settle landed from the prediction, positive when it came late; each
+    error is also exported to the metrics registry under `name`.
+    """
+
+    def __init__(self, default_interval=10, min_interval=2, max_interval=60,
+                 window=15, alpha=0.3, clock=time.monotonic, name="tracker"):
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.window = window
+        self.alpha = alpha
+        self.clock = clock
+        self.name = name
+        self.rounds = {}     # season_id -> (highest settled round, time it was first seen)
+        self.cadence = {}    # season_id -> seconds per round (EWMA)
+        self.settled = set()  # seasons whose last observation is an actual settle, not a first sighting
+        self.prior_cadence = None  # carried over a rollover until new seasons learn their own
+        self.last_error = None
+        self.mean_abs_error = None
+
+    def observe(self, season_id, matches):
+        """Record the settled round of a freshly fetched feed."""
+        now = self.clock()
+        current = settled_round(matches)
+        previous = self.rounds.get(season_id)
+
+        if previous is not None and current <= previous[0]:
+            return
+        self.rounds[season_id] = (current, now)
+        if previous is None or season_id not in self.settled:
+            # the first sighting is mid-round, so only the next settle anchors the cadence
+            if previous is not None:
+                self.settled.add(season_id)
+            return
+
+        predicted = self.predicted_settle_from(previous, season_id)
+        if predicted is not None:
+            self.record_error(now - predicted)
+
+        last_round, last_seen = previous
+        per_round = (now - last_seen) / (current - last_round)
+        old = self.cadence.get(season_id)
+        self.cadence[season_id] = per_round if old is None else old + self.alpha * (per_round - old)
+
+    def record_error(self, error):
+        self.last_error = error
+        SETTLE_ERROR_SECONDS.observe(abs(error), category=self.name)
+        SETTLE_LAST_ERROR.set(error, category=self.name)
+        if self.mean_abs_error is None:
+            self.mean_abs_error = abs(error)
+        else:
+            self.mean_abs_error += self.alpha * (abs(error) - self.mean_abs_error)
+
+    def season_cadence(self, season_id):
+        return self.cadence.get(season_id, self.prior_cadence)
+
+    def predicted_settle_from(self, observation, season_id):
+        cadence = self.season_cadence(season_id)
+        if cadence is None or season_id not in self.settled:
+            return None
+        _, last_seen = observation
+        return last_seen + cadence
+
+    def predicted_settle(self, season_id):
+        if season_id not in self.rounds:
+            return None
+        return self.predicted_settle_from(self.rounds[season_id], season_id)
+
+    def next_settle(self):
+        """Earliest predicted settle across all tracked seasons, or None before any cadence is known."""
+        predictions = [p for p in map(self.predicted_settle, self.rounds) if p is not None]
+        return min(predictions) if predictions else None
+
+    def next_delay(self):
+        predicted = self.next_settle()
+        if predicted is None:
+            return self.default_interval
+
+        until = predicted - self.clock()
+        longest = max(filter(None, map(self.season_cadence, self.settled)))
+        if until < -longest:
+            # a whole round overdue: the schedule has stalled or the season ended
+            return self.default_interval
+        if until <= self.window:
+            return self.min_interval
+        return max(self.min_interval, min(self.max_interval, until - self.window))
+
+    def reset(self):
+        """Forget per-season state after a rollover, keeping the average cadence as a prior."""
+        if self.cadence:
+            self.prior_cadence = sum(self.cadence.values()) / len(self.cadence)
+        self.rounds.clear()
+        self.cadence.clear()
+        self.settled.clear()
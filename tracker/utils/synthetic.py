@@ -0,0 +1,55 @@
+import random
+
+
+def synthetic_matches(teams, rounds, first_match_id=1, settled_rounds=None, draw_rate=0.25, rng=None):
+    """
+    Fixtures in the shape of doc[0].data.matches: every team plays once per
+    round against a rotating opponent. Rounds after `settled_rounds` have no
+    result yet.
+    """
+    rng = rng or random.Random(0)
+    settled_rounds = rounds if settled_rounds is None else settled_rounds
+    matches = []
+    mid = first_match_id
+    for r in range(1, rounds + 1):
+        shift = r % len(teams)
+        rotated = teams[shift:] + teams[:shift]
+        for i in range(0, len(rotated) - 1, 2):
+            if r > settled_rounds:
+                hg = ag = None
+            elif rng.random() < draw_rate:
+                hg = ag = rng.randint(0, 3)
+            else:
+                hg, ag = rng.sample(range(5), 2)
+            matches.append({
+                "_id": mid,
+                "round": r,
+                "teams": {"home": {"name": rotated[i]}, "away": {"name": rotated[i + 1]}},
+                "result": {"home": hg, "away": ag},
+            })
+            mid += 1
+    return matches
+
+
+def synthetic_season(season_id, name, teams=20, rounds=30, settled_rounds=None, seed=0):
+    """One stats_season_lastx response for a league of `teams` teams."""
+    rng = random.Random(f"{seed}-{season_id}")
+    team_names = [f"{name} Team {i + 1}" for i in range(teams)]
+    matches = synthetic_matches(
+        team_names, rounds,
+        first_match_id=int(season_id) * 1000,
+        settled_rounds=settled_rounds,
+        rng=rng,
+    )
+    return {"doc": [{"data": {"season": {"_id": int(season_id), "name": name}, "matches": matches}}]}
+
+
+def synthetic_leagues(base_id, leagues=8, teams=20, rounds=30, settled_rounds=None, seed=0):
+    """{season_id: feed document} for `leagues` consecutive seasons starting at `base_id`."""
+    return {
+        str(base_id + i): synthetic_season(
+            base_id + i, f"Virtual Football League {i + 1}",
+            teams=teams, rounds=rounds, settled_rounds=settled_rounds, seed=seed,
+        )
+        for i in range(leagues)
+    }
@@ -0,0 +1,166 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+# cProfile can only hook one thread's calls at a time, so category threads take turns
+_profile_lock = threading.Lock()
+
+
+class Cycle:
+    """Spans of one tracker cycle; `add` may be called from any thread."""
+
+    def __init__(self, category, number, clock=time.perf_counter):
+        self.category = category
+        self.number = number
+        self.clock = clock
+        self.started_at = time.time()
+        self.started = clock()
+        self.duration = None
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def add(self, name, start, end, **args):
+        """Record a span timed elsewhere, with `start`/`end` read from the same clock."""
+        thread = threading.current_thread()
+        with self.lock:
+            self.spans.append((name, start, end - start, thread.ident, thread.name, args))
+
+    @contextmanager
+    def span(self, name, **args):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.add(name, start, self.clock(), **args)
+
+    def finish(self):
+        self.duration = self.clock() - self.started
+
+    def as_dict(self):
+        with self.lock:
+            spans = list(self.spans)
+        return {
+            "category": self.category,
+            "cycle": self.number,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "spans": [
+                {"name": name, "start": start - self.started, "duration": duration,
+                 "thread": thread_name, "args": args}
+                for name, start, duration, _, thread_name, args in spans
+            ],
+        }
+
+
+class NullCycle:
+    """Stand-in when tracing is off: every call is a no-op."""
+
+    def add(self, name, start, end, **args):
+        pass
+
+    def span(self, name, **args):
+        return nullcontext()
+
+    def finish(self):
+        pass
+
+
+NULL_CYCLE = NullCycle()
+
+
+class CycleTracer:
+    """
+    Keeps the spans of the last `capacity` tracker cycles in a ring buffer.
+
+    Spans are tuples appended under a per-cycle lock, so tracing costs a few
+    microseconds per span and nothing outside it; old cycles fall off the
+    buffer. `dump` writes the buffer as plain JSON or, for a `.trace.json`
+    path, as a Chrome trace (chrome://tracing, Perfetto).
+
+    With `profile_every`, every Nth cycle of each category also runs under
+    cProfile and its stats are written next to the traces. cProfile only
+    sees the thread that runs the cycle, i.e. discovery and the DB writer,
+    not the fetch threads.
+    """
+
+    def __init__(self, capacity=200, enabled=True, profile_every=0, out_dir="traces", log=print):
+        self.cycles = deque(maxlen=capacity)
+        self.enabled = enabled
+        self.profile_every = profile_every
+        self.out_dir = Path(out_dir)
+        self.log = log
+        self.counts = {}
+
+    def start_cycle(self, category):
+        number = self.counts[category] = self.counts.get(category, 0) + 1
+        if not self.enabled:
+            return NULL_CYCLE
+        return Cycle(category, number)
+
+    def end_cycle(self, cycle):
+        if cycle is NULL_CYCLE:
+            return
+        cycle.finish()
+        self.cycles.append(cycle)
+
+    @contextmanager
+    def profile(self, category):
+        """Run the block under cProfile if this is a sampled cycle and no other cycle is being profiled."""
+        number = self.counts.get(category, 0)
+        if not self.profile_every or number % self.profile_every or not _profile_lock.acquire(blocking=False):
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            path = self.out_dir / f"profile-{category}-{number:06d}.prof"
+            profiler.dump_stats(path)
+            self.log(f"🔬 Profiled {category} cycle {number} -> {path}")
+        finally:
+            _profile_lock.release()
+
+    def as_json(self):
+        return [cycle.as_dict() for cycle in list(self.cycles)]
+
+    def chrome_trace(self):
+        """Trace Event Format: one complete ("X") event per span and per cycle."""
+        pid = os.getpid()
+        events, threads = [], {}
+        for cycle in list(self.cycles):
+            base = (cycle.started_at - cycle.started) * 1e6  # perf_counter -> wall-clock microseconds
+            events.append({
+                "name": f"{cycle.category} cycle {cycle.number}", "ph": "X", "pid": pid, "tid": 0,
+                "ts": base + cycle.started * 1e6, "dur": (cycle.duration or 0) * 1e6,
+            })
+            with cycle.lock:
+                spans = list(cycle.spans)
+            for name, start, duration, ident, thread_name, args in spans:
+                threads[ident] = thread_name
+                events.append({
+                    "name": name, "cat": cycle.category, "ph": "X", "pid": pid, "tid": ident,
+                    "ts": base + start * 1e6, "dur": duration * 1e6, "args": args,
+                })
+        events += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": ident, "args": {"name": name}}
+            for ident, name in threads.items()
+        ]
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "cycles"}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path=None):
+        """Write the buffer to `path` (default: a timestamped Chrome trace under out_dir); returns the path."""
+        path = Path(path) if path else self.out_dir / f"tracker-{int(time.time())}.trace.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = self.chrome_trace() if path.name.endswith(".trace.json") else self.as_json()
+        path.write_text(json.dumps(data))
+        return path
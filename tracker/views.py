@@ -1,49 +1,86 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from .cache import get_or_build
+from .metrics import CONTENT_TYPE, REGISTRY
 from .models import League, Team, Season
+from .streams import league_events
 
-def league_list(request):
-    """Show all leagues with navigation and the first league by default, only for active seasons."""
-    all_leagues = League.objects.filter(
+
+def active_leagues():
+    return League.objects.filter(
         team__current_season__active=True
     ).distinct().order_by("external_id")
 
-    # Set the base page as the "current league"
-    current_league = None
 
-    teams = Team.objects.filter(
-        league=current_league, current_season__active=True
-    ).order_by("-streak") if current_league else []
+def render_cached(request, key, build_context):
+    """
+    Serve a page rendered once per data version.
+
+    build_context may raise Http404; only successful renders are cached.
+    """
+    def build():
+        return render(request, "tracker/leagues.html", build_context()).content
+
+    return HttpResponse(get_or_build(key, build))
+
+
+def league_list(request):
+    """Show all leagues with navigation and the first league by default, only for active seasons."""
+    def build_context():
+        all_leagues = active_leagues()
+
+        # Set the base page as the "current league"
+        current_league = None
 
-    no_teams_message = "No teams yet" if current_league and not teams else None
+        teams = Team.objects.filter(
+            league=current_league, current_season__active=True
+        ).order_by("-streak") if current_league else []
 
-    return render(request, "tracker/leagues.html", {
-        "all_leagues": all_leagues,
-        "current_league": current_league,
-        "teams": teams,
-        "no_teams_message": no_teams_message,
-    })
+        no_teams_message = "No teams yet" if current_league and not teams else None
+
+        return {
+            "all_leagues": all_leagues,
+            "current_league": current_league,
+            "teams": teams,
+            "no_teams_message": no_teams_message,
+        }
+
+    return render_cached(request, "page:leagues", build_context)
 
 
 def league_detail(request, league_id):
     """Show one league’s teams sorted by streak, only for active seasons."""
-    all_leagues = League.objects.filter(
-        team__current_season__active=True
-    ).distinct().order_by("external_id")
+    def build_context():
+        all_leagues = active_leagues()
+
+        current_league = get_object_or_404(
+            all_leagues, id=league_id
+        )
+
+        teams = Team.objects.filter(
+            league=current_league, current_season__active=True
+        ).order_by("-streak")
+
+        no_teams_message = "No teams yet" if not teams else None
+
+        return {
+            "all_leagues": all_leagues,
+            "current_league": current_league,
+            "teams": teams,
+            "no_teams_message": no_teams_message,
+        }
+
+    return render_cached(request, f"page:league:{league_id}", build_context)
 
-    current_league = get_object_or_404(
-        all_leagues, id=league_id
-    )
 
-    teams = Team.objects.filter(
-        league=current_league, current_season__active=True
-    ).order_by("-streak")
+def metrics(request):
+    """Prometheus text exposition of this web process's metrics."""
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
 
-    no_teams_message = "No teams yet" if not teams else None
 
-    return render(request, "tracker/leagues.html", {
-        "all_leagues": all_leagues,
-        "current_league": current_league,
-        "teams": teams,
-        "no_teams_message": no_teams_message,
-    })
+async def league_stream(request, league_id):
+    """Server-Sent Events of streak changes for one league; served by the ASGI app."""
+    response = StreamingHttpResponse(league_events(league_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response